@@ -1,15 +1,26 @@
 import tkinter as tk
 import math
+import itertools
+
+from animation import Animator
+from canvas_pool import CanvasItems, CanvasPool
+from colors import shade_color
 
 # --- Configuration ---
 WIDTH, HEIGHT = 900, 600
 BG_COLOR = "#f5f5f5"  # Light/White background
 FOV = 600
 FLOOR_Y = 100         # Y coordinate of the floor (ground level)
+RETAINED = True       # Reuse canvas items between frames instead of delete("all")
+SHADOW_OFFSET = (10, 10) # Shadows fall this far along +x and +z, on the floor
+SELECT_EASING = "out_cubic" # Curve of the select animation, a key of animation.EASINGS
+SELECT_STEPS = 10     # ... and its length in ticks
 LIGHT_DIR = None      # Will initialize later
 
 # --- 3D Vector Math ---
 class Vector3:
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x, y, z):
         self.x, self.y, self.z = x, y, z
     
@@ -109,9 +120,25 @@ def create_grid(size, step, color):
         
     return verts, lines
 
+# --- Shadows ---
+def convex_hull(points):
+    """ Convex hull of 2D points, counter-clockwise without repeats (Andrew's monotone chain) """
+    pts = sorted(set(points))
+    if len(pts) <= 2: return pts
+    def chain(seq):
+        out = []
+        for p in seq:
+            while len(out) >= 2 and ((out[-1][0] - out[-2][0]) * (p[1] - out[-2][1])
+                                     - (out[-1][1] - out[-2][1]) * (p[0] - out[-2][0])) <= 0:
+                out.pop()
+            out.append(p)
+        return out
+    lower, upper = chain(pts), chain(reversed(pts))
+    return lower[:-1] + upper[:-1]
+
 # --- Core Object Class ---
 class Object3D:
-    def __init__(self, name, verts, faces, pos, is_line=False):
+    def __init__(self, name, verts, faces, pos, is_line=False, static=False):
         self.name = name
         self.raw_verts = verts 
         self.faces = faces     
@@ -120,13 +147,10 @@ class Object3D:
         self.selected = False
         self.target_scale = 1.0
         self.is_line = is_line # New flag for lines vs polygons
-
-    def update(self):
-        diff = self.target_scale - self.scale_val
-        if abs(diff) > 0.01:
-            self.scale_val += diff * 0.2
-        else:
-            self.scale_val = self.target_scale
+        self.static = static   # Room shell: drawn from the merged StaticMesh
+        self.footprint = None  # Object-space (x, z) hull of the mesh, the mesh never changes
+        self.shadow = None     # World-space floor outline, valid for shadow_key
+        self.shadow_key = None
 
     def toggle_select(self):
         if self.is_line: return False
@@ -141,12 +165,58 @@ class Object3D:
             res.append(sv.add(self.pos))
         return res
 
-    def get_shadow_verts(self, world_verts):
+    def shadow_outline(self):
+        """ Floor outline of the shadow as world (x, y, z) points, recomputed only after
+        pos or scale_val changed: the footprint hull scaled, moved and offset """
         if self.is_line: return []
-        res = []
-        for v in world_verts:
-            res.append(Vector3(v.x + 10, FLOOR_Y + 1, v.z + 10)) 
-        return res
+        key = (self.pos.x, self.pos.z, self.scale_val)
+        if key != self.shadow_key:
+            if self.footprint is None:
+                self.footprint = convex_hull([(v.x, v.z) for v in self.raw_verts])
+            s, dx, dz = self.scale_val, self.pos.x + SHADOW_OFFSET[0], self.pos.z + SHADOW_OFFSET[1]
+            self.shadow = [(x * s + dx, FLOOR_Y + 1, z * s + dz) for x, z in self.footprint]
+            self.shadow_key = key
+        return self.shadow
+
+# --- Static Geometry ---
+class StaticMesh:
+    """ The static objects merged into one world-space mesh: a single vertex list and per-face
+    lists (faces as (indices, color), owners, face_ids, lines), so the shell gets one camera
+    pass per frame. Rebuilt only when one of them moved or was rescaled (select animation) """
+    def __init__(self, objects):
+        self.objects = objects
+        self.members = [i for i, obj in enumerate(objects) if obj.static]
+        self.key = None
+        self.refresh()
+
+    def refresh(self):
+        key = [(o.pos.x, o.pos.y, o.pos.z, o.scale_val) for o in (self.objects[i] for i in self.members)]
+        if key == self.key: return
+        self.key = key
+        self.verts, self.faces, self.owners, self.face_ids, self.lines = [], [], [], [], []
+        for i in self.members:
+            obj = self.objects[i]
+            base = len(self.verts)
+            self.verts += obj.get_world_verts()
+            for fi, (sub_indices, color_arg) in enumerate(obj.faces):
+                self.faces.append(([base + k for k in sub_indices], color_arg))
+                self.owners.append(i)
+                self.face_ids.append(fi)
+                self.lines.append(obj.is_line)
+
+# --- Camera ---
+def camera_verts(world_verts, cos_y, sin_y, cos_x, sin_x):
+    """ World -> camera space (rotate world around camera) """
+    cam_verts = []
+    for v in world_verts:
+        # Rotate Y
+        x = v.x * cos_y - v.z * sin_y
+        z = v.x * sin_y + v.z * cos_y
+        # Rotate X
+        y = v.y * cos_x - z * sin_x
+        z = v.y * sin_x + z * cos_x
+        cam_verts.append(Vector3(x, y, z))
+    return cam_verts
 
 # --- Engine & UI ---
 class LivingRoomApp(tk.Tk):
@@ -169,6 +239,9 @@ class LivingRoomApp(tk.Tk):
         # Scene Objects
         self.objects = []
         self.init_scene()
+        self.static_mesh = StaticMesh(self.objects)
+        self.animator = Animator()
+        self.pool = CanvasPool(CanvasItems(self.canvas, self.create_item)) if RETAINED else None
 
         # Input
         self.bind("<KeyPress>", self.on_key)
@@ -189,7 +262,7 @@ class LivingRoomApp(tk.Tk):
         # 0. Perspective Grid (The "Box" look)
         # Floor Grid
         gx, gl = create_grid(800, 100, "#CCCCCC") 
-        self.objects.append(Object3D("Grid Floor", gx, gl, Vector3(0, FLOOR_Y, 0), is_line=True))
+        self.objects.append(Object3D("Grid Floor", gx, gl, Vector3(0, FLOOR_Y, 0), is_line=True, static=True))
         
         # Wall Grids (Rotated manually or just created as lines)
         # Back Wall Grid (Vertical lines only for panel look?) No, full grid for "Box Perspective"
@@ -215,21 +288,21 @@ class LivingRoomApp(tk.Tk):
             ([0, 4], "black"), ([1, 5], "black"), ([2, 6], "black"), ([3, 7], "black")  # Connecting
         ]
         # Add Room Wireframe to make it "Kotak"
-        self.objects.append(Object3D("Room Box", box_verts, box_lines, Vector3(0,0,0), is_line=True))
+        self.objects.append(Object3D("Room Box", box_verts, box_lines, Vector3(0,0,0), is_line=True, static=True))
 
         # 1. Room Shell
         # Floor
         v, f = create_box(800, 10, 800, C_FLOOR)
-        self.objects.append(Object3D("Floor", v, f, Vector3(0, FLOOR_Y+5, 0)))
+        self.objects.append(Object3D("Floor", v, f, Vector3(0, FLOOR_Y+5, 0), static=True))
         
         # Back Wall (Blue with "Panels")
         v, f = create_box(800, 500, 10, C_WALL) 
-        self.objects.append(Object3D("Back Wall", v, f, Vector3(0, -150, -300)))
+        self.objects.append(Object3D("Back Wall", v, f, Vector3(0, -150, -300), static=True))
         
         # Panels (Decor)
         for x in [-250, -100, 50, 200]:
             v, f = create_box(40, 400, 20, "#0D47A1") 
-            self.objects.append(Object3D("Wall Decor", v, f, Vector3(x, -150, -290)))
+            self.objects.append(Object3D("Wall Decor", v, f, Vector3(x, -150, -290), static=True))
 
         # 2. Yellow Sofa
         # Main Body
@@ -282,6 +355,7 @@ class LivingRoomApp(tk.Tk):
                 idx = int(tag.split(":")[1])
                 obj = self.objects[idx]
                 is_sel = obj.toggle_select()
+                self.animator.animate(obj, "scale_val", obj.target_scale, SELECT_STEPS, SELECT_EASING)
                 name_found = obj.name
                 
                 # Feedback text
@@ -299,16 +373,13 @@ class LivingRoomApp(tk.Tk):
         if self.keys_pressed.get("Up"): self.cam_angle_x -= 0.05
         if self.keys_pressed.get("Down"): self.cam_angle_x += 0.05
 
-        # Update Anim
-        for obj in self.objects:
-            obj.update()
+        # Update Anim (only the objects still tweening)
+        self.animator.step()
 
         self.draw()
         self.after(30, self.update_loop)
 
     def draw(self):
-        self.canvas.delete("all")
-        
         cx, cy = WIDTH / 2, HEIGHT / 2
         
         # Precompute Rotation Matrix
@@ -317,134 +388,122 @@ class LivingRoomApp(tk.Tk):
 
         render_list = [] # Stores (depth, type, coords, color, tag)
 
+        # Room shell: the merged world-space mesh, one camera pass for all of it
+        static = self.static_mesh
+        static.refresh()
+        cam_verts = camera_verts(static.verts, cos_y, sin_y, cos_x, sin_x)
+        self.emit_faces(render_list, cam_verts, zip(static.faces, static.owners, static.face_ids, static.lines))
+
         for i, obj in enumerate(self.objects):
-            # 1. Transform Vertices to World Space
-            world_verts = obj.get_world_verts()
-            
-            # 2. Camera Transform (Rotate world around camera)
-            cam_verts = []
-            for v in world_verts:
-                # Rotate Y
-                x = v.x * cos_y - v.z * sin_y
-                z = v.x * sin_y + v.z * cos_y
-                # Rotate X
-                y = v.y * cos_x - z * sin_x
-                z = v.y * sin_x + z * cos_x
-                cam_verts.append(Vector3(x, y, z))
-
-            # 3. Faces Processing
-            for sub_indices, color_arg in obj.faces:
-                # Get Face Vertices
-                sub_verts = [cam_verts[idx] for idx in sub_indices]
-                
-                # Project to 2D
-                points_2d = []
-                depth_sum = 0
-                visible = True
-                
-                for v in sub_verts:
-                    dist = 800 + v.z # offset cam back
-                    if dist < 10: 
-                        visible = False; break
-                    factor = FOV / dist
-                    px = cx + v.x * factor
-                    py = cy + v.y * factor
-                    points_2d.append((px, py))
-                    depth_sum += dist
-                
-                if visible and len(sub_verts) > 1: # Line has 2 verts, Poly >2
-                    avg_depth = depth_sum / len(sub_verts)
-                    
-                    if obj.is_line:
-                        # Type 2: Line/Grid
-                        render_list.append((avg_depth, 2, points_2d, color_arg, f"obj:{i}"))
-                    else:
-                        # Normal Calculation
-                        v0, v1, v2 = sub_verts[0], sub_verts[1], sub_verts[2]
-                        edge1, edge2 = v1.sub(v0), v2.sub(v0)
-                        normal = edge1.cross(edge2).normalize()
-
-                        # Lighting Fix:
-                        # Assume Light comes from Top-Right-Front relative to CAMERA view
-                        # Light Vector pointing TO the light source
-                        L_SOURCE = Vector3(0.5, -1.0, 0.5).normalize() 
-                        # Note: If Y is down in 2D, in 3D usually Y is Up or Down depending on coord system.
-                        # Here projection: py = cy + v.y. Height is Y.
-                        # In create_box, Top is -h/2 (if y is down?) no, usually -y is up in screen coords.
-                        # Let's just use the observed normal.
-                        
-                        # Dot Product:
-                        # If Normal points at Light, brightness is high.
-                        intensity = normal.dot(L_SOURCE)
-                        
-                        # If Faces are defined CCW, normal points out.
-                        # Let's map [-1, 1] to [0.3, 1.0]
-                        # Intensity 1.0 (Facing Light) -> Brightest
-                        # Intensity -1.0 (Facing Away) -> Darkest
-                        
-                        val = 0.6 + (intensity * 0.4) # Base 0.6 + up to 0.4
-                        val = max(0.4, min(1.0, val))
-                        
-                        # Apply color brightness
-                        try:
-                            r = int(int(color_arg[1:3], 16) * val)
-                            g = int(int(color_arg[3:5], 16) * val)
-                            b = int(int(color_arg[5:7], 16) * val)
-                            shade_col = f"#{r:02x}{g:02x}{b:02x}"
-                        except ValueError:
-                            shade_col = color_arg
-
-                        # Type 1: Object Face
-                        render_list.append((avg_depth, 1, points_2d, shade_col, f"obj:{i}"))
+            if not obj.static:
+                # 1. Transform Vertices to World Space, 2. Camera Transform
+                cam_verts = camera_verts(obj.get_world_verts(), cos_y, sin_y, cos_x, sin_x)
+                # 3. Faces Processing
+                faces = zip(obj.faces, itertools.repeat(i), itertools.count(), itertools.repeat(obj.is_line))
+                self.emit_faces(render_list, cam_verts, faces)
 
             # 4. Shadow Render (Fake)
-            # Create a simplified shadow blob (convex hull or just face projection)
-            # We skip culling for shadows, just project all floor-facing faces?
-            # Simpler: Project ALL vertices to floor, draw a single polygon for 'bottom' faces?
-            # Let's just project faces that face 'down' or all faces
+            # One polygon per object: the cached floor hull, only its outline is transformed
             if not obj.is_line and obj.name != "Floor" and obj.name != "Back Wall":
-                shad_verts = obj.get_shadow_verts(world_verts)
-                # Rotate Shadow Verts for Camera
-                shad_cam_verts = []
-                for v in shad_verts:
-                    x = v.x * cos_y - v.z * sin_y
-                    z = v.x * sin_y + v.z * cos_y
-                    y = v.y * cos_x - z * sin_x
-                    z = v.y * sin_x + z * cos_x
-                    shad_cam_verts.append(Vector3(x, y, z))
-                
-                # Just draw the "Bottom" face or a bounding box shadow for performance
-                # Draw the first face as shadow (hacky but works for boxes)
-                if len(obj.faces) > 0:
-                    sf_indices = obj.faces[0][0] # Just use first face for blob
-                    sf_verts = [shad_cam_verts[idx] for idx in sf_indices]
-                    
-                    sp_2d = []
-                    s_depth = 0
-                    for v in sf_verts:
-                        dist = 800 + v.z
-                        f = FOV/dist
-                        sp_2d.append((cx + v.x*f, cy + v.y*f))
-                        s_depth += dist
-                    
-                    # Type 0: Shadow (Furthest usually, but we sort anyway)
-                    # We use stipple for transparency simulation
-                    render_list.append((s_depth/len(sf_verts) + 50, 0, sp_2d, "gray80", "")) 
+                outline = obj.shadow_outline()
+                sp_2d = []
+                s_depth = 0
+                for x, y, z in outline:
+                    rx = x * cos_y - z * sin_y
+                    rz = x * sin_y + z * cos_y
+                    dist = 800 + y * sin_x + rz * cos_x
+                    if dist < 10: break
+                    f = FOV / dist
+                    sp_2d += (cx + rx * f, cy + (y * cos_x - rz * sin_x) * f)
+                    s_depth += dist
+                else:
+                    if len(outline) > 2:
+                        # Type 0: Shadow (Furthest usually, but we sort anyway)
+                        # We use stipple for transparency simulation
+                        render_list.append((s_depth / len(outline) + 50, 0, sp_2d, "gray80", "", (i, -1)))
 
         # Sort: Furthest First (Painter's Algo)
         # Depth is distance FROM camera (larger = further)
         render_list.sort(key=lambda x: x[0], reverse=True)
 
-        for _, r_type, pts, col, tag in render_list:
-            if r_type == 0: # Shadow
-                 # No outline for shadow
-                 if len(pts) > 2:
-                    self.canvas.create_polygon(pts, fill="#BBBBBB", outline="", stipple="gray50") 
-            elif r_type == 2: # Line/Grid
-                 self.canvas.create_line(pts, fill=col, width=1, tags=tag)
-            else: # Polygon
-                if len(pts) > 2:
-                    self.canvas.create_polygon(pts, fill=col, outline="black", width=1, tags=tag)
+        if self.pool is not None:
+            self.pool.sync(render_list)
+            return
+
+        self.canvas.delete("all")
+        for _, r_type, pts, col, tag, _ in render_list:
+            self.create_item(r_type, pts, col, tag)
+
+    def emit_faces(self, render_list, cam_verts, faces):
+        """ Projects and shades faces ((sub_indices, color_arg), object index, face index, is_line)
+        over camera space vertices, appending their render items """
+        cx, cy = WIDTH / 2, HEIGHT / 2
+        for (sub_indices, color_arg), i, fi, is_line in faces:
+            # Get Face Vertices
+            sub_verts = [cam_verts[idx] for idx in sub_indices]
+            
+            # Project to 2D
+            points_2d = []
+            depth_sum = 0
+            visible = True
+            
+            for v in sub_verts:
+                dist = 800 + v.z # offset cam back
+                if dist < 10: 
+                    visible = False; break
+                factor = FOV / dist
+                px = cx + v.x * factor
+                py = cy + v.y * factor
+                points_2d += (px, py)
+                depth_sum += dist
+            
+            if visible and len(sub_verts) > 1: # Line has 2 verts, Poly >2
+                avg_depth = depth_sum / len(sub_verts)
+                
+                if is_line:
+                    # Type 2: Line/Grid
+                    render_list.append((avg_depth, 2, points_2d, color_arg, f"obj:{i}", (i, fi)))
+                elif len(sub_verts) > 2:
+                    # Normal Calculation
+                    v0, v1, v2 = sub_verts[0], sub_verts[1], sub_verts[2]
+                    edge1, edge2 = v1.sub(v0), v2.sub(v0)
+                    normal = edge1.cross(edge2).normalize()
+
+                    # Lighting Fix:
+                    # Assume Light comes from Top-Right-Front relative to CAMERA view
+                    # Light Vector pointing TO the light source
+                    L_SOURCE = Vector3(0.5, -1.0, 0.5).normalize() 
+                    # Note: If Y is down in 2D, in 3D usually Y is Up or Down depending on coord system.
+                    # Here projection: py = cy + v.y. Height is Y.
+                    # In create_box, Top is -h/2 (if y is down?) no, usually -y is up in screen coords.
+                    # Let's just use the observed normal.
+                    
+                    # Dot Product:
+                    # If Normal points at Light, brightness is high.
+                    intensity = normal.dot(L_SOURCE)
+                    
+                    # If Faces are defined CCW, normal points out.
+                    # Let's map [-1, 1] to [0.3, 1.0]
+                    # Intensity 1.0 (Facing Light) -> Brightest
+                    # Intensity -1.0 (Facing Away) -> Darkest
+                    
+                    val = 0.6 + (intensity * 0.4) # Base 0.6 + up to 0.4
+                    val = max(0.4, min(1.0, val))
+                    
+                    # Apply color brightness
+                    shade_col = shade_color(color_arg, val)
+
+                    # Type 1: Object Face
+                    render_list.append((avg_depth, 1, points_2d, shade_col, f"obj:{i}", (i, fi)))
+
+    def create_item(self, r_type, pts, col, tag):
+        if r_type == 0: # Shadow
+            # No outline for shadow
+            return self.canvas.create_polygon(pts, fill="#BBBBBB", outline="", stipple="gray50")
+        elif r_type == 2: # Line/Grid
+            return self.canvas.create_line(pts, fill=col, width=1, tags=tag)
+        else: # Polygon
+            return self.canvas.create_polygon(pts, fill=col, outline="black", width=1, tags=tag)
 
 if __name__ == "__main__":
     app = LivingRoomApp()
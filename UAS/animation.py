@@ -0,0 +1,53 @@
+""" Tweens for the viewers' animations: only running ones are kept and stepped, so objects at
+rest cost nothing per tick """
+
+def ease_linear(t): return t
+def ease_out_cubic(t): return 1 - (1 - t) ** 3
+def ease_in_out_cubic(t): return 4 * t ** 3 if t < 0.5 else 1 - (2 - 2 * t) ** 3 / 2
+def ease_out_back(t):
+    """ Overshoots by ~10% before settling """
+    return 1 + 2.70158 * (t - 1) ** 3 + 1.70158 * (t - 1) ** 2
+
+EASINGS = {"linear": ease_linear, "out_cubic": ease_out_cubic, "in_out_cubic": ease_in_out_cubic,
+           "out_back": ease_out_back}
+
+class Tween:
+    """ obj.attr from start to end over steps ticks, shaped by easing (t in 0..1 -> 0..1) """
+    __slots__ = ("obj", "attr", "start", "end", "steps", "easing", "k")
+    def __init__(self, obj, attr, start, end, steps, easing):
+        self.obj, self.attr = obj, attr
+        self.start, self.end = start, end
+        self.steps, self.easing = max(1, steps), easing
+        self.k = 0
+
+    def step(self):
+        """ Advances one step, returns False once it has set end exactly """
+        self.k += 1
+        if self.k >= self.steps:
+            setattr(self.obj, self.attr, self.end)
+            return False
+        setattr(self.obj, self.attr, self.start + (self.end - self.start) * self.easing(self.k / self.steps))
+        return True
+
+class Animator:
+    """ The running tweens by (object, attribute). A step only touches these, idle objects cost nothing """
+    def __init__(self):
+        self.active = {}
+
+    def animate(self, obj, attr, end, steps=10, easing="out_cubic"):
+        """ Tweens obj.attr to end from its current value, replacing a tween already running on it.
+        easing: a key of EASINGS or a function """
+        start = getattr(obj, attr)
+        if start == end:
+            self.active.pop((obj, attr), None)
+            return
+        if isinstance(easing, str): easing = EASINGS[easing]
+        self.active[(obj, attr)] = Tween(obj, attr, start, end, steps, easing)
+
+    def step(self):
+        """ Advances every active tween and retires the settled ones, returns True while any is left """
+        done = [key for key, tween in self.active.items() if not tween.step()]
+        for key in done: del self.active[key]
+        return bool(self.active)
+
+    def __len__(self): return len(self.active)
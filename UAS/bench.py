@@ -0,0 +1,137 @@
+""" Benchmark for the simple_3d_room renderer: synthetic scenes of increasing size, a fixed
+camera orbit, per-stage timings and peak memory as JSON lines (one per scene size and pipeline).
+
+    python bench.py                           # 10 .. 100k faces, both pipelines
+    python bench.py --sizes 1000,20000 --frames 12 --out results.jsonl
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+import tkinter as tk
+
+import simple_3d_room as room
+from simple_3d_room import Object3D, Vector3, SceneState, StageTimer, get_mesh, render_frame, frame_counters
+from canvas_pool import CanvasBatch, CanvasPool
+
+STAGES = ("cull", "world", "camera", "projection", "shading", "sort", "emit")
+PALETTE = ["#263238", "#546E7A", "#B0BEC5", "#D7CCC8", "#4E342E", "#FFCC80", "#4CAF50", "#EFEBE9"]
+
+# --- Synthetic Scenes ---
+def synthetic_scene(n_faces, seed=0):
+    """ Boxes (6 faces) and cylinders (8-14 faces) on a grid over the floor until there are
+    at least n_faces faces. A few sizes per scene, so meshes are shared like real furniture """
+    rng = random.Random(seed)
+    side = max(1, math.ceil(math.sqrt(n_faces / 7.5)))
+    spacing = 800 / side
+    objects, faces = [], 0
+    for k in range(side * side * 2):
+        if faces >= n_faces: break
+        cell = k % (side * side)
+        x = -400 + (cell % side + 0.5) * spacing
+        z = -400 + (cell // side + 0.5) * spacing
+        size = spacing * rng.choice((0.3, 0.5, 0.7))
+        color = rng.choice(PALETTE)
+        if rng.random() < 0.7:
+            mesh = get_mesh("box", size, size * 1.5, size, color)
+            name = "Box"
+        else:
+            mesh = get_mesh("cylinder", size / 2, size * 1.5, rng.choice((6, 8, 12)), color)
+            name = "Cylinder"
+        y = room.FLOOR_Y - size * 0.75 - (k // (side * side)) * size * 1.5 # Second layer stacks on the first
+        objects.append(Object3D(name, mesh, None, Vector3(x, y, z)))
+        faces += len(mesh.color_idx)
+    return objects, faces
+
+def camera_orbit(frames, cam_angle_x=0.35, cam_zoom=1.0):
+    """ frames poses (cam_angle_x, cam_angle_y, cam_zoom) once around the scene """
+    return [(cam_angle_x, 2 * math.pi * k / frames, cam_zoom) for k in range(frames)]
+
+# --- Measurement ---
+def run_frames(objects, poses, batched, canvas=None):
+    """ The viewer's frame (render_frame: octree cull, LOD, static merge / BSP, project, sort) for
+    each pose, plus canvas emission. Returns (StageTimer, frame seconds, frame_counters per frame) """
+    scene = SceneState(objects, batched=batched)
+    pool = CanvasPool(CanvasBatch(canvas)) if canvas is not None else None
+
+    timer, frame_times, counters = StageTimer(), [], []
+    for cam_angle_x, cam_angle_y, cam_zoom in poses:
+        t0 = time.perf_counter()
+        timer.start()
+        frame = render_frame(scene, cam_angle_x, cam_angle_y, cam_zoom, timer=timer, count_culled=True)
+        if pool is not None:
+            pool.sync(frame.render_list)
+            canvas.update_idletasks() # Include Tk's own redraw
+            timer.lap("emit")
+        frame_times.append(time.perf_counter() - t0)
+        counters.append(dict(frame_counters(scene, frame), items=len(frame.render_list)))
+    return timer, frame_times, counters
+
+def peak_memory(n_faces, batched):
+    """ Peak traced bytes of building the scene and of one frame, measured apart from the timed run """
+    tracemalloc.start()
+    objects, _ = synthetic_scene(n_faces)
+    build_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    run_frames(objects, camera_orbit(1), batched)
+    frame_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return build_peak, frame_peak
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def bench(n_faces, batched, frames, canvas=None):
+    room.MESH_CACHE.clear()
+    t0 = time.perf_counter()
+    objects, faces = synthetic_scene(n_faces)
+    build_ms = (time.perf_counter() - t0) * 1000
+    timer, frame_times, counters = run_frames(objects, camera_orbit(frames), batched, canvas)
+    build_peak, frame_peak = peak_memory(n_faces, batched)
+    ms = [t * 1000 for t in frame_times]
+    return {
+        "faces": faces,
+        "objects": len(objects),
+        "meshes": len(room.MESH_CACHE),
+        "pipeline": "batched" if batched else "scalar",
+        "frames": frames,
+        "build_ms": round(build_ms, 3),
+        "frame_ms": {"mean": round(sum(ms) / len(ms), 3), "p50": round(percentile(ms, 0.5), 3),
+                     "p95": round(percentile(ms, 0.95), 3), "max": round(max(ms), 3)},
+        "stage_ms": {stage: round(timer.totals[stage] * 1000 / frames, 3) for stage in STAGES if stage in timer.totals},
+        "items_per_frame": round(sum(c["items"] for c in counters) / frames, 1),
+        "faces_culled_per_frame": round(sum(c["faces_culled"] for c in counters) / frames, 1),
+        "peak_bytes": {"build": build_peak, "frame": frame_peak},
+        "canvas": canvas is not None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage renderer benchmark")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000", help="comma separated face counts")
+    parser.add_argument("--frames", type=int, default=24, help="camera orbit poses per scene")
+    parser.add_argument("--pipelines", default="batched,scalar", help="batched and/or scalar")
+    parser.add_argument("--max-scalar-faces", type=int, default=20000, help="skip the scalar pipeline above this")
+    parser.add_argument("--no-canvas", action="store_true", help="skip canvas emission (also skipped without a display)")
+    parser.add_argument("--out", help="write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    canvas = None
+    if not args.no_canvas:
+        try:
+            root = tk.Tk()
+            canvas = tk.Canvas(root, width=room.WIDTH, height=room.HEIGHT, bg=room.BG_COLOR)
+            canvas.pack()
+        except tk.TclError:
+            print("no display, canvas emission not measured", file=sys.stderr)
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    for n_faces in (int(v) for v in args.sizes.split(",")):
+        for pipeline in args.pipelines.split(","):
+            if pipeline == "batched" and room.np is None: continue
+            if pipeline == "scalar" and n_faces > args.max_scalar_faces: continue
+            if canvas is not None: canvas.delete("all")
+            print(json.dumps(bench(n_faces, pipeline == "batched", args.frames, canvas)), file=out, flush=True)
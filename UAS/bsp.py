@@ -0,0 +1,123 @@
+EPSILON = 1e-3 # Points closer than this to a plane count as on it
+
+class Poly:
+    """ Convex world-space polygon: points [(x, y, z)], unit normal, plane offset d and a payload """
+    __slots__ = ("points", "normal", "d", "data")
+
+    def __init__(self, points, normal, data, d=None):
+        self.points = points
+        self.normal = normal
+        self.d = d if d is not None else dot(normal, points[0])
+        self.data = data
+
+class BSPNode:
+    __slots__ = ("plane", "polys", "front", "back", "front_slot", "back_slot")
+
+    def __init__(self, plane):
+        self.plane = plane # (normal, d)
+        self.polys = []    # Coplanar with the plane, either facing
+        self.front = self.back = None
+        self.front_slot = self.back_slot = None # Leaf cell ids where a child is empty
+
+def dot(a, b): return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+def split_poly(poly, normal, d):
+    """ Returns (front part, back part), either may be None """
+    sides = [dot(normal, p) - d for p in poly.points]
+    if all(s >= -EPSILON for s in sides): return poly, None
+    if all(s <= EPSILON for s in sides): return None, poly
+
+    front, back = [], []
+    n = len(poly.points)
+    for k in range(n):
+        a, b = poly.points[k], poly.points[(k + 1) % n]
+        sa, sb = sides[k], sides[(k + 1) % n]
+        if sa >= -EPSILON: front.append(a)
+        if sa <= EPSILON: back.append(a)
+        if (sa > EPSILON and sb < -EPSILON) or (sa < -EPSILON and sb > EPSILON):
+            t = sa / (sa - sb)
+            p = (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t, a[2] + (b[2] - a[2]) * t)
+            front.append(p)
+            back.append(p)
+    return (Poly(front, poly.normal, poly.data, poly.d) if len(front) > 2 else None,
+            Poly(back, poly.normal, poly.data, poly.d) if len(back) > 2 else None)
+
+class BSPTree:
+    """ Built once over static polygons; walk(eye) yields them back to front, with leaf cell ids
+    in between so moving objects can be slotted into the order (see locate) """
+    def __init__(self, polys, candidates=8):
+        self.candidates = candidates
+        self.n_slots = 0
+        self.root = self.build(list(polys))
+
+    def choose_plane(self, polys):
+        """ Among the first few polygons, the plane that splits the fewest others """
+        best, best_splits = polys[0], None
+        for cand in polys[:self.candidates]:
+            splits = 0
+            for p in polys:
+                sides = [dot(cand.normal, q) - cand.d for q in p.points]
+                if min(sides) < -EPSILON and max(sides) > EPSILON: splits += 1
+            if best_splits is None or splits < best_splits:
+                best, best_splits = cand, splits
+        return best.normal, best.d
+
+    def build(self, polys):
+        if not polys: return None
+        normal, d = self.choose_plane(polys)
+        node = BSPNode((normal, d))
+        front, back = [], []
+        for p in polys:
+            sides = [dot(normal, q) - d for q in p.points]
+            if all(abs(s) <= EPSILON for s in sides):
+                node.polys.append(p)
+                continue
+            f, b = split_poly(p, normal, d)
+            if f is not None: front.append(f)
+            if b is not None: back.append(b)
+        node.front = self.build(front)
+        node.back = self.build(back)
+        if node.front is None:
+            node.front_slot = self.new_slot()
+        if node.back is None:
+            node.back_slot = self.new_slot()
+        return node
+
+    def new_slot(self):
+        self.n_slots += 1
+        return self.n_slots - 1
+
+    def locate(self, point):
+        """ Leaf cell id containing point """
+        node = self.root
+        if node is None: return 0
+        while True:
+            normal, d = node.plane
+            if dot(normal, point) - d >= 0:
+                if node.front is None: return node.front_slot
+                node = node.front
+            else:
+                if node.back is None: return node.back_slot
+                node = node.back
+
+    def walk(self, eye):
+        """ Yields Polys facing eye and int cell ids, furthest first """
+        if self.root is None:
+            yield 0
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, BSPNode):
+                yield node # Poly or cell id, already in order
+                continue
+            normal, d = node.plane
+            if dot(normal, eye) - d >= 0:
+                far, far_slot, near, near_slot = node.back, node.back_slot, node.front, node.front_slot
+            else:
+                far, far_slot, near, near_slot = node.front, node.front_slot, node.back, node.back_slot
+            # Pushed in reverse: far side, this node's polys, near side
+            stack.append(near if near is not None else near_slot)
+            for p in node.polys:
+                if dot(p.normal, eye) - p.d > 0: stack.append(p) # Back faces never show
+            stack.append(far if far is not None else far_slot)
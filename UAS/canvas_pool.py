@@ -0,0 +1,164 @@
+""" Retained canvas: one canvas item per face key, updated in place between frames. The item
+commands go through a small backend, CanvasBatch (lists of items per Tcl call) or CanvasItems
+(one Tkinter call per item) """
+import bisect
+
+# A frame's canvas commands go to Tcl one call per kind of command: each proc loops over
+# lists Tkinter converts natively, instead of one Python -> Tcl round trip per item
+CANVAS_TCL = """
+namespace eval canvas_batch {
+    proc create {c kinds coords fills tags} {
+        set ids {}
+        foreach kind $kinds xy $coords fill $fills tag $tags {
+            if {$kind eq "line"} {
+                lappend ids [$c create line $xy -fill $fill -width 1 -tags $tag]
+            } else {
+                lappend ids [$c create polygon $xy -fill $fill -outline {} -tags $tag]
+            }
+        }
+        return $ids
+    }
+    proc coords {c items coords} { foreach i $items xy $coords { $c coords $i $xy } }
+    proc fill {c items fills} { foreach i $items fill $fills { $c itemconfigure $i -fill $fill } }
+    proc state {c items state} { foreach i $items { $c itemconfigure $i -state $state } }
+    proc restack {c items above} {
+        foreach i $items a $above { if {$a eq ""} { $c lower $i } else { $c raise $i $a } }
+    }
+}
+"""
+ITEM_KINDS = {1: "polygon", 2: "line"} # render_list r_type -> canvas item type
+
+class CanvasBatch:
+    """ Canvas commands on lists of items, each list sent in one tk.call through CANVAS_TCL """
+    def __init__(self, canvas):
+        self.tk, self.path = canvas.tk, str(canvas)
+        self.tk.eval(CANVAS_TCL)
+
+    def create(self, items):
+        """ items: (r_type, pts, col, tag, ...) tuples; returns the new item ids in the same order """
+        if not items: return []
+        ids = self.tk.call("canvas_batch::create", self.path, [ITEM_KINDS[item[0]] for item in items],
+                           [item[1] for item in items], [item[2] for item in items], [item[3] for item in items])
+        return [int(i) for i in self.tk.splitlist(ids)]
+
+    def coords(self, items, coords):
+        if items: self.tk.call("canvas_batch::coords", self.path, items, coords)
+
+    def fill(self, items, fills):
+        if items: self.tk.call("canvas_batch::fill", self.path, items, fills)
+
+    def state(self, items, state):
+        if items: self.tk.call("canvas_batch::state", self.path, items, state)
+
+    def restack(self, items, above):
+        """ Raises each item just above the matching entry of above ("" = to the bottom), in order """
+        if items: self.tk.call("canvas_batch::restack", self.path, items, above)
+
+class CanvasItems:
+    """ Same interface as CanvasBatch, one Tkinter call per item. create_item(r_type, pts, col, tag)
+    makes an item, so a renderer keeps its own item styles (e.g. stippled shadows) """
+    def __init__(self, canvas, create_item):
+        self.canvas, self.create_item = canvas, create_item
+
+    def create(self, items):
+        return [self.create_item(*item[:4]) for item in items]
+
+    def coords(self, items, coords):
+        for item, pts in zip(items, coords): self.canvas.coords(item, pts)
+
+    def fill(self, items, fills):
+        for item, fill in zip(items, fills): self.canvas.itemconfig(item, fill=fill)
+
+    def state(self, items, state):
+        for item in items: self.canvas.itemconfig(item, state=state)
+
+    def restack(self, items, above):
+        for item, a in zip(items, above):
+            if a == "": self.canvas.tag_lower(item)
+            else: self.canvas.tag_raise(item, a)
+
+def longest_increasing(seq):
+    """ Indices into seq forming a longest strictly increasing run (None entries never join) """
+    tails, tail_idx, prev = [], [], [None] * len(seq)
+    for i, v in enumerate(seq):
+        if v is None: continue
+        j = bisect.bisect_left(tails, v)
+        prev[i] = tail_idx[j - 1] if j else None
+        if j == len(tails):
+            tails.append(v); tail_idx.append(i)
+        else:
+            tails[j] = v; tail_idx[j] = i
+    keep = set()
+    i = tail_idx[-1] if tail_idx else None
+    while i is not None:
+        keep.add(i)
+        i = prev[i]
+    return keep
+
+class CanvasPool:
+    """ One canvas item per face key, updated in place instead of delete("all") + create """
+    def __init__(self, batch):
+        self.batch = batch # CanvasBatch or CanvasItems of the canvas
+        self.items = {}    # key -> [item_id, coords, fill, shown]
+        self.order = []    # visible item ids, bottom to top, as Tk currently stacks them
+
+    def sync(self, render_list):
+        """ render_list must already be sorted furthest first; returns the number of item
+        operations (creates, coords, fills, shows / hides, restacks) handed to the backend """
+        stack_pos = {item: n for n, item in enumerate(self.order)}
+        top = len(self.order)
+        new_order, seq, seen = [], [], set()
+        created, created_at = [], []
+        moved, coords, recoloured, fills, shown = [], [], [], [], []
+
+        for _, r_type, pts, col, tag, key in render_list:
+            entry = self.items.get(key)
+            if entry is None:
+                created.append((r_type, pts, col, tag, key))
+                created_at.append(len(new_order))
+                item = None # Filled in once the batch is created
+                pos = top   # New items land on top, in creation order
+                top += 1
+            else:
+                item = entry[0]
+                if entry[1] != pts:
+                    moved.append(item); coords.append(pts)
+                    entry[1] = pts
+                if entry[2] != col:
+                    recoloured.append(item); fills.append(col)
+                    entry[2] = col
+                if not entry[3]:
+                    shown.append(item)
+                    entry[3] = True
+                pos = stack_pos.get(item) # None for re-shown items, their slot is unknown
+            seen.add(key)
+            new_order.append(item)
+            seq.append(pos)
+
+        batch = self.batch
+        for n, item, (_, pts, col, _, key) in zip(created_at, batch.create(created), created):
+            new_order[n] = item
+            self.items[key] = [item, pts, col, True]
+        hidden = []
+        for key, entry in self.items.items():
+            if entry[3] and key not in seen:
+                hidden.append(entry[0])
+                entry[3] = False
+        batch.coords(moved, coords)
+        batch.fill(recoloured, fills)
+        batch.state(shown, "normal")
+        batch.state(hidden, "hidden")
+        ops = len(created) + len(moved) + len(recoloured) + len(shown) + len(hidden)
+
+        # Restack: items on the longest already-ordered run stay, the rest move
+        if new_order != self.order:
+            keep = longest_increasing(seq)
+            restacked, above = [], []
+            for n, item in enumerate(new_order):
+                if n in keep: continue
+                restacked.append(item)
+                above.append(new_order[n - 1] if n else "")
+            batch.restack(restacked, above)
+            ops += len(restacked)
+        self.order = new_order
+        return ops
@@ -0,0 +1,26 @@
+import functools
+
+SHADE_LEVELS = 64         # Lighting intensity is quantized to this many steps
+SHADE_CACHE_SIZE = 4096   # Max memoized (colour, level) strings
+
+@functools.lru_cache(maxsize=SHADE_CACHE_SIZE)
+def parse_color(color_arg):
+    """ "#rrggbb" -> (r, g, b), parsed once per colour; None for named Tk colours """
+    if not color_arg.startswith("#"): return None
+    try:
+        return int(color_arg[1:3], 16), int(color_arg[3:5], 16), int(color_arg[5:7], 16)
+    except ValueError:
+        return None
+
+@functools.lru_cache(maxsize=SHADE_CACHE_SIZE)
+def shade_level(color_arg, level):
+    """ Tk colour string for color_arg at brightness level / SHADE_LEVELS """
+    rgb = parse_color(color_arg)
+    if rgb is None: return color_arg
+    val = level / SHADE_LEVELS
+    r, g, b = int(rgb[0] * val), int(rgb[1] * val), int(rgb[2] * val)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+def shade_color(color_arg, val):
+    """ Scales a "#rrggbb" colour by brightness val, other Tk colours pass through """
+    return shade_level(color_arg, int(val * SHADE_LEVELS + 0.5))
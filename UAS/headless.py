@@ -0,0 +1,145 @@
+""" Offscreen rendering of the simple_3d_room scene, no display needed (NumPy required).
+
+    python headless.py thumb.png --pose 0.35,2.6,1.0 --size 320x224
+    python headless.py frames/frame_%03d.ppm --orbit 36
+    python headless.py layout.png --scene living_room.json
+    python headless.py fly/frame_%04d.png --pose 0.35,-0.6,1 --pose 0.2,2.6,1.6 --frames 300 --jobs 8
+"""
+import argparse
+import math
+import multiprocessing
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from simple_3d_room import WIDTH, HEIGHT, BG_COLOR, SceneState, build_scene, load_scene, render_frame
+from zbuffer import ZBuffer
+
+# --- Image Files ---
+def ppm_bytes(rgb):
+    h, w, _ = rgb.shape
+    return b"P6\n%d %d\n255\n" % (w, h) + np.ascontiguousarray(rgb).tobytes()
+
+def png_bytes(rgb):
+    """ 8-bit RGB PNG, stdlib zlib only """
+    h, w, _ = rgb.shape
+    rows = np.zeros((h, w * 3 + 1), dtype=np.uint8) # Filter byte 0 + pixels per row
+    rows[:, 1:] = rgb.reshape(h, -1)
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows.tobytes())) + chunk(b"IEND", b""))
+
+def image_bytes(rgb, path):
+    """ PNG or PPM file contents, by the extension of path """
+    return png_bytes(rgb) if path.lower().endswith(".png") else ppm_bytes(rgb)
+
+def save_image(rgb, path):
+    with open(path, "wb") as f:
+        f.write(image_bytes(rgb, path))
+
+# --- Renderer ---
+class OffscreenRenderer:
+    """ Renders a list of Object3D (default: build_scene()) from camera poses into RGB arrays """
+    def __init__(self, objects=None, size=(WIDTH, HEIGHT), background=BG_COLOR):
+        self.objects = build_scene() if objects is None else objects
+        self.scene = SceneState(self.objects, use_bsp=False, batched=True) # The viewer's z-buffer setup
+        self.zbuf = ZBuffer(size[0], size[1], background)
+        self.timings = [] # Seconds per rendered frame
+
+    def render(self, pose):
+        """ pose = (cam_angle_x, cam_angle_y, cam_zoom); returns the (h, w, 3) uint8 buffer, overwritten by the next call """
+        t = time.perf_counter()
+        for obj in self.objects: obj.lod = 0 # No hysteresis between frames: a pose always gives the same pixels
+        render_frame(self.scene, *pose, zbuf=self.zbuf)
+        self.timings.append(time.perf_counter() - t)
+        return self.zbuf.color
+
+    def frames(self, poses):
+        """ Yields a copy of each frame """
+        for pose in poses:
+            yield self.render(pose).copy()
+
+    def save(self, poses, pattern):
+        """ Writes frame k to pattern % k (.png or .ppm), returns the paths """
+        paths = []
+        for k, pose in enumerate(poses):
+            path = pattern % k if "%" in pattern else pattern
+            save_image(self.render(pose), path)
+            paths.append(path)
+        return paths
+
+def orbit(n, cam_angle_x=0.35, cam_zoom=1.0):
+    """ n poses evenly spaced around the room """
+    return [(cam_angle_x, 2 * math.pi * k / n, cam_zoom) for k in range(n)]
+
+def camera_path(keyframes, frames):
+    """ frames poses through the keyframe poses, an equal share of frames per leg.
+    Angles move linearly, zoom geometrically (steady zoom speed) """
+    if len(keyframes) < 2 or frames < 2: return list(keyframes[:1]) * frames
+    poses = []
+    for k in range(frames):
+        t = k * (len(keyframes) - 1) / (frames - 1)
+        leg = min(int(t), len(keyframes) - 2)
+        (ax0, ay0, z0), (ax1, ay1, z1) = keyframes[leg], keyframes[leg + 1]
+        u = t - leg
+        poses.append((ax0 + (ax1 - ax0) * u, ay0 + (ay1 - ay0) * u, z0 * (z1 / z0) ** u))
+    return poses
+
+# --- Process Pool ---
+# Each worker builds its own scene and renderer once; frames are rendered and encoded
+# there, only the file bytes come back
+worker = None
+
+def init_worker(scene_file, size):
+    global worker
+    worker = OffscreenRenderer(load_scene(scene_file) if scene_file else None, size)
+
+def render_job(job):
+    path, pose = job
+    rgb = worker.render(pose)
+    return path, image_bytes(rgb, path), worker.timings[-1]
+
+def render_parallel(poses, pattern, processes=None, scene_file=None, size=(WIDTH, HEIGHT), chunksize=2):
+    """ Renders poses across a pool of processes (default: one per core) and writes frame k to
+    pattern % k as soon as it and every frame before it are done. Returns (paths, seconds each
+    frame took to render in its worker) """
+    jobs = [(pattern % k if "%" in pattern else pattern, pose) for k, pose in enumerate(poses)]
+    paths, timings = [], []
+    with multiprocessing.Pool(processes, init_worker, (scene_file, size)) as pool:
+        for path, data, seconds in pool.imap(render_job, jobs, chunksize): # imap keeps pose order
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+            timings.append(seconds)
+    return paths, timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the room without a display")
+    parser.add_argument("out", help="output file, use %%d (e.g. frame_%%03d.png) for several poses")
+    parser.add_argument("--pose", action="append", default=[], help="cam_angle_x,cam_angle_y,cam_zoom (repeatable)")
+    parser.add_argument("--orbit", type=int, default=0, help="add N poses circling the room")
+    parser.add_argument("--size", default=f"{WIDTH}x{HEIGHT}", help="WIDTHxHEIGHT of the output images")
+    parser.add_argument("--scene", help="JSON layout to render instead of the built-in room")
+    parser.add_argument("--frames", type=int, default=0, help="fly through the --pose keyframes in N frames")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes, 0 = one per core")
+    args = parser.parse_args()
+
+    poses = [tuple(float(v) for v in p.split(",")) for p in args.pose]
+    if args.frames: poses = camera_path(poses or [(0.35, -0.6, 1.0)], args.frames)
+    poses += orbit(args.orbit)
+    if not poses: poses = [(0.35, -0.6, 1.0)] # LivingRoomApp's start view
+    w, h = (int(v) for v in args.size.lower().split("x"))
+
+    t = time.perf_counter()
+    if args.jobs == 1:
+        renderer = OffscreenRenderer(load_scene(args.scene) if args.scene else None, size=(w, h))
+        paths, timings = renderer.save(poses, args.out), renderer.timings
+    else:
+        paths, timings = render_parallel(poses, args.out, args.jobs or None, args.scene, (w, h))
+    wall = time.perf_counter() - t
+    ms = [t * 1000 for t in timings]
+    print(f"{len(paths)} frames, {w}x{h}: mean {sum(ms) / len(ms):.1f} ms, max {max(ms):.1f} ms, "
+          f"{len(paths) / wall:.1f} frames/s overall")
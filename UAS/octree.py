@@ -0,0 +1,113 @@
+class OctreeNode:
+    __slots__ = ("lo", "hi", "items", "children")
+
+    def __init__(self, lo, hi):
+        self.lo, self.hi = lo, hi # Box corners (x, y, z)
+        self.items = set()        # Keys whose box fits here but in no single child
+        self.children = None
+
+def box_fits(lo, hi, node):
+    return all(node.lo[a] <= lo[a] and hi[a] <= node.hi[a] for a in range(3))
+
+def box_vs_planes(lo, hi, planes):
+    """ None if the box is outside one of the planes, else the planes it still straddles """
+    c = [(lo[a] + hi[a]) / 2 for a in range(3)]
+    h = [(hi[a] - lo[a]) / 2 for a in range(3)]
+    straddle = []
+    for plane in planes:
+        nx, ny, nz, d = plane
+        s = nx * c[0] + ny * c[1] + nz * c[2] + d
+        r = abs(nx) * h[0] + abs(ny) * h[1] + abs(nz) * h[2]
+        if s < -r: return None
+        if s < r: straddle.append(plane)
+    return straddle
+
+class Octree:
+    """ Axis-aligned boxes keyed by id, queried with inside-positive planes (n.p + d >= 0) """
+    def __init__(self, max_items=8, max_depth=8):
+        self.max_items, self.max_depth = max_items, max_depth
+        self.root = None
+        self.boxes = {}   # key -> (lo, hi)
+        self.node_of = {} # key -> node holding it
+
+    def insert(self, key, lo, hi):
+        self.boxes[key] = (lo, hi)
+        if self.root is None or not box_fits(lo, hi, self.root):
+            self.rebuild()
+        else:
+            self.place(self.root, key, lo, hi, 0)
+
+    def remove(self, key):
+        node = self.node_of.pop(key, None)
+        if node is not None: node.items.discard(key)
+        self.boxes.pop(key, None)
+
+    def update(self, key, lo, hi):
+        self.remove(key)
+        self.insert(key, lo, hi)
+
+    def rebuild(self):
+        """ New root cube around every box, with slack so small moves don't force another rebuild """
+        self.node_of.clear()
+        if not self.boxes:
+            self.root = None
+            return
+        lo = [min(b[0][a] for b in self.boxes.values()) for a in range(3)]
+        hi = [max(b[1][a] for b in self.boxes.values()) for a in range(3)]
+        half = max(hi[a] - lo[a] for a in range(3)) * 0.75 + 1.0
+        c = [(lo[a] + hi[a]) / 2 for a in range(3)]
+        self.root = OctreeNode(tuple(c[a] - half for a in range(3)), tuple(c[a] + half for a in range(3)))
+        for key, (lo, hi) in self.boxes.items():
+            self.place(self.root, key, lo, hi, 0)
+
+    def place(self, node, key, lo, hi, depth):
+        while True:
+            if node.children is None:
+                if len(node.items) < self.max_items or depth >= self.max_depth:
+                    break
+                self.split(node)
+            child = next((c for c in node.children if box_fits(lo, hi, c)), None)
+            if child is None: break
+            node, depth = child, depth + 1
+        node.items.add(key)
+        self.node_of[key] = node
+
+    def split(self, node):
+        mid = [(node.lo[a] + node.hi[a]) / 2 for a in range(3)]
+        node.children = []
+        for octant in range(8):
+            lo = tuple(mid[a] if octant >> a & 1 else node.lo[a] for a in range(3))
+            hi = tuple(node.hi[a] if octant >> a & 1 else mid[a] for a in range(3))
+            node.children.append(OctreeNode(lo, hi))
+        items, node.items = node.items, set()
+        for key in items:
+            lo, hi = self.boxes[key]
+            child = next((c for c in node.children if box_fits(lo, hi, c)), node)
+            child.items.add(key)
+            self.node_of[key] = child
+
+    def query(self, planes):
+        """ Keys whose box is not entirely outside any plane; whole subtrees are
+        rejected (or accepted without further tests) at once """
+        out = []
+        stack = [(self.root, list(planes))] if self.root is not None else []
+        while stack:
+            node, planes = stack.pop()
+            planes = box_vs_planes(node.lo, node.hi, planes)
+            if planes is None: continue
+            if not planes:
+                self.collect(node, out)
+                continue
+            for key in node.items:
+                lo, hi = self.boxes[key]
+                if box_vs_planes(lo, hi, planes) is not None: out.append(key)
+            if node.children:
+                stack.extend((c, planes) for c in node.children)
+        return out
+
+    def collect(self, node, out):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            out.extend(node.items)
+            if node.children: stack.extend(node.children)
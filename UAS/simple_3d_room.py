@@ -1,15 +1,56 @@
 import tkinter as tk
 import math
+import array
+import functools
+import operator
+import time
+import collections
+import csv
+import json
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:   # NumPy is optional, draw() falls back to the scalar pipeline
+    np = None
+else:
+    from zbuffer import ZBuffer # Software rasterizer backend, NumPy only
+
+from animation import Animator
+from bsp import BSPTree, Poly
+from canvas_pool import CanvasBatch, CanvasPool
+from colors import SHADE_LEVELS, parse_color, shade_level, shade_color
+from octree import Octree
 
 # --- Configuration ---
 WIDTH, HEIGHT = 1000, 700
 BG_COLOR = "#ECEFF1"  # Soft Blue-Grey Background
 FOV = 900
+NEAR = 10             # Closest camera distance (FOV + z) that is drawn, faces are clipped there
 FLOOR_Y = 150         # Y coordinate of the floor (ground level)
+RETAINED = True       # Reuse canvas items between frames instead of delete("all")
+ROTATE_KEYS = ("Left", "Right", "Up", "Down")
+SIM_STEP = 0.030      # Seconds of simulated time per step (camera rotation, select animation)
+MAX_STEPS = 5         # Catch-up limit per tick; anything further behind is dropped, not replayed
+RENDER_BACKEND = "canvas" # "canvas" (one polygon per face) or "zbuffer" (one PhotoImage, needs NumPy)
+USE_BSP = True            # Canvas backend: order static objects with a BSP tree instead of sorting them
+USE_OCTREE = True         # Skip moving objects whose bounds fall outside the view frustum
+HUD_KEY = "F3"            # Toggles the performance overlay
+STATS_CSV = None          # Path to write per-frame counters to (CSV), None = off
+PICK_CELL = 16            # Pick grid cell size in pixels
+LOD_ERROR_PX = 1.0        # Cylinders drop to fewer segments while their outline moves less than this
+LOD_HYSTERESIS = 1.5      # ... with this much margin before going coarser, so sizes near a threshold don't pop
+LOD_MIN_SEGMENTS = 3      # Coarsest level: a triangular prism
+SCENE_FILE = None         # JSON layout to load instead of build_scene() (e.g. "living_room.json")
+SELECT_EASING = "out_cubic" # Curve of the select animation, a key of animation.EASINGS
+SELECT_STEPS = 10         # ... and its length in SIM_STEPs
 LIGHT_DIR = None      # Will initialize later
 
 # --- 3D Vector Math ---
 class Vector3:
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x, y, z):
         self.x, self.y, self.z = x, y, z
     
@@ -33,6 +74,7 @@ class Vector3:
         return Vector3(self.x/m, self.y/m, self.z/m) if m else Vector3(0,0,0)
 
 LIGHT_DIR = Vector3(0.5, -0.8, -0.5).normalize()
+L_SOURCE = Vector3(0.4, -0.8, 0.4).normalize()   # Light used for face shading (camera space)
 
 # --- Object Factory ---
 def create_box(w, h, d, color):
@@ -62,12 +104,12 @@ def create_cylinder(radius, height, segments, color):
     verts = []
     hh = height / 2
     # Top and Bottom rings
+    ring = []
     for i in range(segments):
         theta = (2 * math.pi * i) / segments
-        x = radius * math.cos(theta)
-        z = radius * math.sin(theta)
-        verts.append(Vector3(x, hh, z))  # Top ring: indices 0 to segments-1
-        verts.append(Vector3(x, -hh, z)) # Bottom ring: indices segments to 2*segments-1
+        ring.append((radius * math.cos(theta), radius * math.sin(theta)))
+    verts += [Vector3(x, hh, z) for x, z in ring]  # Top ring: indices 0 to segments-1
+    verts += [Vector3(x, -hh, z) for x, z in ring] # Bottom ring: indices segments to 2*segments-1
     
     faces = []
     # Side faces
@@ -87,37 +129,259 @@ def create_cylinder(radius, height, segments, color):
     faces.append((bot_indices, color))
     return verts, faces
 
+def face_normals(verts, faces):
+    """ Outward unit normal per face (Newell's method, works for n-gons) """
+    normals = []
+    for sub_indices, _ in faces:
+        nx = ny = nz = 0.0
+        n = len(sub_indices)
+        for k in range(n):
+            a, b = verts[sub_indices[k]], verts[sub_indices[(k + 1) % n]]
+            nx += (a.y - b.y) * (a.z + b.z)
+            ny += (a.z - b.z) * (a.x + b.x)
+            nz += (a.x - b.x) * (a.y + b.y)
+        # create_box/create_cylinder wind their faces so this points into the mesh
+        normals.append(Vector3(-nx, -ny, -nz).normalize())
+    return normals
+
+# --- Shared Meshes ---
+NP_TYPES = {"f": "float32", "i": "int32", "H": "uint16"}
+
+def typed_buffer(typecode, data):
+    """ array(typecode) from any sequence; NumPy arrays are copied as raw bytes """
+    if isinstance(data, array.array) and data.typecode == typecode: return data
+    buf = array.array(typecode)
+    if np is not None and isinstance(data, np.ndarray):
+        buf.frombytes(np.ascontiguousarray(data, dtype=NP_TYPES[typecode]).tobytes())
+    else:
+        buf.extend(data)
+    return buf
+
+class VertexView:
+    """ Read-only sequence of Vector3 over a flat xyz buffer (built on access) """
+    __slots__ = ("buf",)
+    def __init__(self, buf): self.buf = buf
+    def __len__(self): return len(self.buf) // 3
+    def __getitem__(self, i):
+        if i < 0: i += len(self)
+        b, k = self.buf, 3 * i
+        return Vector3(b[k], b[k + 1], b[k + 2])
+    def __iter__(self):
+        b = self.buf
+        for k in range(0, len(b), 3):
+            yield Vector3(b[k], b[k + 1], b[k + 2])
+
+class FaceView:
+    """ Read-only sequence of (indices, colour) faces, the old Object3D.faces layout """
+    __slots__ = ("mesh",)
+    def __init__(self, mesh): self.mesh = mesh
+    def __len__(self): return len(self.mesh.color_idx)
+    def __getitem__(self, f):
+        m = self.mesh
+        if f < 0: f += len(self)
+        return m.index_buf[m.face_start[f]:m.face_start[f + 1]], m.palette[m.color_idx[f]]
+    def __iter__(self):
+        for f in range(len(self)): yield self[f]
+
+class Mesh:
+    """ Immutable geometry shared by any number of Object3Ds, stored in flat typed buffers:
+    vertex_buf float32 xyz, index_buf int32, face_start int32 (F+1 offsets into index_buf,
+    so quads and n-gons mix), color_idx uint16 into palette, normal_buf float32 xyz per face """
+    __slots__ = ("vertex_buf", "index_buf", "face_start", "color_idx", "palette", "normal_buf",
+                 "verts", "faces", "normals", "lo", "hi", "shape")
+
+    def __init__(self, verts, faces):
+        """ From the (Vector3 list, [(indices, colour)]) pair create_box/create_cylinder return """
+        vertex_buf = array.array("f")
+        for v in verts: vertex_buf.extend((v.x, v.y, v.z))
+        index_buf, face_start, color_idx = array.array("i"), array.array("i", [0]), array.array("H")
+        palette = {}
+        for sub_indices, color in faces:
+            index_buf.extend(sub_indices)
+            face_start.append(len(index_buf))
+            color_idx.append(palette.setdefault(color, len(palette)))
+        self.set_buffers(vertex_buf, index_buf, face_start, color_idx, list(palette))
+
+    @classmethod
+    def from_buffers(cls, vertex_buf, index_buf, face_start, color_idx, palette):
+        """ Wraps flat arrays (e.g. a loaded scan) without building per-vertex objects """
+        mesh = cls.__new__(cls)
+        mesh.set_buffers(typed_buffer("f", vertex_buf), typed_buffer("i", index_buf),
+                         typed_buffer("i", face_start), typed_buffer("H", color_idx), list(palette))
+        return mesh
+
+    def set_buffers(self, vertex_buf, index_buf, face_start, color_idx, palette):
+        self.vertex_buf, self.index_buf, self.face_start = vertex_buf, index_buf, face_start
+        self.color_idx, self.palette = color_idx, palette
+        self.shape = None # get_mesh() key when the mesh came from there
+        # Adapters so Object3D.raw_verts / faces / normals keep their old shape
+        self.verts = VertexView(vertex_buf)
+        self.faces = FaceView(self)
+        self.normal_buf = self.compute_normals() # Object space, zero for lines
+        self.normals = VertexView(self.normal_buf)
+        # Object-space bounding box
+        axes = [vertex_buf[a::3] for a in range(3)]
+        self.lo = tuple(min(c) if len(c) else 0.0 for c in axes)
+        self.hi = tuple(max(c) if len(c) else 0.0 for c in axes)
+
+    def compute_normals(self):
+        """ Outward unit normal per face, vectorised when NumPy is available """
+        if np is None or not len(self.color_idx):
+            normal_buf = array.array("f")
+            for n in face_normals(self.verts, self.faces): normal_buf.extend((n.x, n.y, n.z))
+            return normal_buf
+        # Newell's method over all faces at once (same result as face_normals)
+        v = np.frombuffer(self.vertex_buf, dtype=np.float32).reshape(-1, 3).astype(float)
+        idx = np.frombuffer(self.index_buf, dtype=np.int32)
+        start = np.frombuffer(self.face_start, dtype=np.int32)
+        nxt = np.arange(1, len(idx) + 1)
+        nxt[start[1:] - 1] = start[:-1] # Last vertex of each face wraps to its first
+        nxt = idx[nxt]
+        n = np.empty((len(start) - 1, 3))
+        for axis, (p, q) in enumerate(((1, 2), (2, 0), (0, 1))): # One axis at a time keeps temporaries small
+            ap, bp, aq, bq = v[idx, p], v[nxt, p], v[idx, q], v[nxt, q]
+            n[:, axis] = -np.add.reduceat((ap - bp) * (aq + bq), start[:-1])
+        m = np.linalg.norm(n, axis=1)
+        n[m > 0] /= m[m > 0, None]
+        return typed_buffer("f", n)
+
+def box_bounds(w, h, d, color):
+    return (-w / 2, -h / 2, -d / 2), (w / 2, h / 2, d / 2)
+
+def cylinder_bounds(radius, height, segments, color):
+    return (-radius, -height / 2, -radius), (radius, height / 2, radius) # Box around the full circle
+
+MESH_SHAPES = {"box": create_box, "cylinder": create_cylinder}
+MESH_BOUNDS = {"box": box_bounds, "cylinder": cylinder_bounds}
+MESH_CACHE = {} # (shape, dimensions..., [segments,] colour) -> Mesh
+
+def get_mesh(shape, *params):
+    """ get_mesh("box", w, h, d, color) / get_mesh("cylinder", radius, height, segments, color) """
+    key = (shape,) + params
+    mesh = MESH_CACHE.get(key)
+    if mesh is None:
+        mesh = MESH_CACHE[key] = Mesh(*MESH_SHAPES[shape](*params))
+        mesh.shape = key
+    return mesh
+
+def get_lods(mesh):
+    """ Levels of detail of a get_mesh() cylinder, finest first: its segment count halved down to
+    LOD_MIN_SEGMENTS. None for other meshes or when there is nothing coarser """
+    if mesh.shape is None or mesh.shape[0] != "cylinder": return None
+    _, radius, height, segments, color = mesh.shape
+    lods = [mesh]
+    while segments // 2 >= LOD_MIN_SEGMENTS:
+        segments //= 2
+        lods.append(get_mesh("cylinder", radius, height, segments, color))
+    return tuple(lods) if len(lods) > 1 else None
+
+class MeshRef:
+    """ Stand-in for a Mesh that is built on first use: bounds are known up front so the
+    octree can cull the object, geometry only exists once it is drawn """
+    __slots__ = ("build", "lo", "hi", "mesh")
+
+    def __init__(self, build, lo, hi):
+        self.build, self.lo, self.hi = build, lo, hi
+        self.mesh = None
+
+    def get(self):
+        if self.mesh is None: self.mesh = self.build()
+        return self.mesh
+
+def lazy_mesh(shape, *params):
+    """ MeshRef for get_mesh(shape, *params) """
+    return MeshRef(functools.partial(get_mesh, shape, *params), *MESH_BOUNDS[shape](*params))
+
 # --- Core Object Class ---
 class Object3D:
-    def __init__(self, name, verts, faces, pos, is_line=False):
+    on_change = None # Set by the viewer; called whenever pos, scale or selection changes
+
+    def __init__(self, name, verts, faces, pos, is_line=False, static=False):
+        """ verts may also be a shared Mesh from get_mesh() or a MeshRef, faces is then ignored """
         self.name = name
-        self.raw_verts = verts 
-        self.faces = faces     
+        self._mesh = verts if isinstance(verts, (Mesh, MeshRef)) else Mesh(verts, faces)
+        self.version = 0       # Bumped on every pos / scale / selection change
+        self.world_key = None  # (version, mesh) world_verts belongs to
+        self.world_verts = None
         self.pos = pos        
         self.scale_val = 1.0
         self.selected = False
         self.target_scale = 1.0
         self.is_line = is_line
+        self.static = static # Room shell etc., expected to stay put
+        self.lods = None     # Meshes finest first (see get_lods), () when there are none
+        self.lod = 0         # Index into lods of the mesh drawn, set by select_lods()
 
-    def update(self):
-        diff = self.target_scale - self.scale_val
-        if abs(diff) > 0.01:
-            self.scale_val += diff * 0.2
-        else:
-            self.scale_val = self.target_scale
+    # Geometry lives in the (possibly shared) mesh, the object only adds a transform
+    @property
+    def mesh(self):
+        """ The mesh drawn: full_mesh, or a coarser level of it """
+        if self.lod: return self.lods[self.lod]
+        return self.full_mesh
+    @property
+    def full_mesh(self):
+        mesh = self._mesh
+        if isinstance(mesh, MeshRef): mesh = self._mesh = mesh.get()
+        return mesh
+    @property
+    def built(self):
+        """ False while the mesh is a MeshRef nobody has built yet """
+        return not isinstance(self._mesh, MeshRef) or self._mesh.mesh is not None
+    @property
+    def raw_verts(self): return self.mesh.verts
+    @property
+    def faces(self): return self.mesh.faces
+    @property
+    def normals(self): return self.mesh.normals
+
+    # Assign a new Vector3 to pos (don't mutate it in place) so the viewer sees the change
+    @property
+    def pos(self): return self._pos
+    @pos.setter
+    def pos(self, v):
+        self._pos = v
+        self.changed()
+
+    @property
+    def scale_val(self): return self._scale_val
+    @scale_val.setter
+    def scale_val(self, v):
+        self._scale_val = v
+        self.changed()
+
+    def changed(self):
+        self.version += 1
+        if self.on_change is not None: self.on_change(self)
 
     def toggle_select(self):
+        """ Flips the selection and its target_scale, an Animator moves scale_val there """
         if self.is_line: return False
         self.selected = not self.selected
         self.target_scale = 1.1 if self.selected else 1.0
+        self.changed()
         return self.selected
 
+    def get_lods(self):
+        """ Levels of detail, worked out on first use; moving cylinders only """
+        if self.lods is None:
+            self.lods = () if self.static or self.is_line else get_lods(self.full_mesh) or ()
+        return self.lods
+
+    def world_bounds(self):
+        """ World-space bounding box (lo, hi) of the scaled and translated mesh (not built for it) """
+        s, p, lo, hi = self.scale_val, self.pos, self._mesh.lo, self._mesh.hi
+        return ((p.x + lo[0] * s, p.y + lo[1] * s, p.z + lo[2] * s),
+                (p.x + hi[0] * s, p.y + hi[1] * s, p.z + hi[2] * s))
+
     def get_world_verts(self):
-        res = []
-        for v in self.raw_verts:
-            sv = v.mul(self.scale_val)
-            res.append(sv.add(self.pos))
-        return res
+        """ Scaled and translated vertices (shared Vector3s, don't modify them), only recomputed
+        after the transform changed or a different level of detail is drawn """
+        key = (self.version, self.mesh)
+        if key != self.world_key:
+            s, p = self.scale_val, self.pos
+            self.world_verts = [Vector3(v.x * s + p.x, v.y * s + p.y, v.z * s + p.z) for v in self.raw_verts]
+            self.world_key = key
+        return self.world_verts
 
     def get_shadow_verts(self, world_verts):
         if self.is_line: return []
@@ -127,9 +391,1080 @@ class Object3D:
             res.append(Vector3(v.x + 30, FLOOR_Y + 1, v.z + 30)) 
         return res
 
+# --- Depth Sort ---
+DEPTH = operator.itemgetter(0) # Sort key of a render_list item (its average camera distance)
+
+class DepthOrder:
+    """ Painter's order kept between frames, for faces numbered 0..n_faces-1. Faces are laid out in
+    last frame's order and a stable sort on the new depths repairs it: faces whose order didn't
+    change keep their slot (ties included), and NumPy's stable sort (Timsort for floats) runs in
+    close to linear time on such nearly ordered input """
+    def __init__(self, n_faces):
+        self.rank = np.full(n_faces, -1, dtype=np.intp)      # Slot last frame, -1 = not drawn
+        self.ids = np.empty(0, dtype=np.intp)                # Last frame's ids, in the order given
+        self.layout = self.ids                               # and the permutation that sorted them
+        self.drawn = self.ids                                # Last frame's ids, furthest first
+
+    def sort(self, ids, depth):
+        """ Permutation putting ids / depth furthest first """
+        if np.array_equal(ids, self.ids):
+            layout = self.layout # Same faces as last frame: reuse its order directly
+        else:
+            rank = self.rank[ids] # Old faces back into their old slots, new ones after
+            kept = rank >= 0
+            slots = np.full(len(self.drawn), -1, dtype=np.intp)
+            slots[rank[kept]] = np.flatnonzero(kept)
+            layout = np.concatenate([slots[slots >= 0], np.flatnonzero(~kept)])
+        order = layout[np.argsort(-depth[layout], kind="stable")]
+
+        self.rank[self.drawn] = -1
+        self.drawn = ids[order]
+        self.rank[self.drawn] = np.arange(len(order))
+        self.ids, self.layout = ids, order
+        return order
+
+    def grow(self, n_faces):
+        """ Numbers up to n_faces - 1 are valid from now on, the order kept so far stays """
+        self.rank = np.concatenate([self.rank, np.full(n_faces - len(self.rank), -1, dtype=np.intp)])
+
+# --- Profiling ---
+class StageTimer:
+    """ Seconds spent per pipeline stage: lap(stage) charges the time since the previous lap (or start) """
+    def __init__(self):
+        self.totals = {}
+        self.last = time.perf_counter()
+
+    def start(self):
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.totals[stage] = self.totals.get(stage, 0.0) + now - self.last
+        self.last = now
+
+class FrameStats:
+    """ Per-frame counters for the HUD and CSV export, with a rolling window of frame times """
+    FIELDS = ("time", "frame_ms", "fps_p5", "objects", "faces_submitted", "faces_culled", "culled_backface",
+              "culled_frustum", "culled_octree", "items_emitted", "sort_size", "dropped_frames")
+
+    def __init__(self, window=120):
+        self.frame_times = collections.deque(maxlen=window)
+        self.row = None
+        self.stream = self.writer = None
+
+    def export_csv(self, stream):
+        """ Writes a header now and one row per recorded frame from then on, flushed as it goes """
+        self.stream = stream
+        self.writer = csv.writer(stream)
+        self.writer.writerow(self.FIELDS)
+
+    def close(self):
+        """ Stops the CSV export and closes its stream """
+        if self.stream is not None: self.stream.close()
+        self.stream = self.writer = None
+
+    def fps_percentile(self, q):
+        """ FPS that q percent of the recent frames fall below (from the slowest frame times) """
+        times = sorted(self.frame_times)
+        slow = times[min(len(times) - 1, int(len(times) * (100 - q) / 100))]
+        return 1.0 / slow if slow > 0 else 0.0
+
+    def record(self, frame_time, **counters):
+        self.frame_times.append(frame_time)
+        self.row = dict(counters, time=round(time.time(), 3), frame_ms=round(frame_time * 1000, 2),
+                        fps_p5=round(self.fps_percentile(5), 1))
+        if self.writer is not None:
+            self.writer.writerow([self.row[f] for f in self.FIELDS])
+            self.stream.flush() # A killed session keeps every frame so far
+
+    def text(self):
+        r = self.row
+        if r is None: return ""
+        return (f"frame {r['frame_ms']:.1f} ms   p5 {r['fps_p5']:.0f} fps\n"
+                f"objects {r['objects']}\n"
+                f"faces {r['faces_submitted']} in, {r['faces_culled']} culled\n"
+                f"  back {r['culled_backface']}  frustum {r['culled_frustum']}  octree {r['culled_octree']}\n"
+                f"canvas ops {r['items_emitted']}   sorted {r['sort_size']}\n"
+                f"dropped frames {r['dropped_frames']}")
+
+# --- View Frustum ---
+# Camera-space planes (normal, d) over zoomed (x, y, z) with dist = FOV + z, inside where
+# normal.p + d >= 0: near (dist >= NEAR), then the screen edges, e.g. right: x * FOV / dist <= WIDTH / 2
+CAM_PLANES = [((0, 0, 1), FOV - NEAR),
+              ((-FOV, 0, WIDTH / 2), WIDTH / 2 * FOV), ((FOV, 0, WIDTH / 2), WIDTH / 2 * FOV),
+              ((0, -FOV, HEIGHT / 2), HEIGHT / 2 * FOV), ((0, FOV, HEIGHT / 2), HEIGHT / 2 * FOV)]
+
+def frustum_planes(cam_angle_x, cam_angle_y, cam_zoom):
+    """ CAM_PLANES moved to world space as (nx, ny, nz, d) """
+    cos_y, sin_y = math.cos(cam_angle_y), math.sin(cam_angle_y)
+    cos_x, sin_x = math.cos(cam_angle_x), math.sin(cam_angle_x)
+    rows = ((cos_y, 0.0, -sin_y), (-sin_x * sin_y, cos_x, -sin_x * cos_y), (cos_x * sin_y, sin_x, cos_x * cos_y))
+    planes = []
+    for n, d in CAM_PLANES:
+        # cam = zoom * R * world, so the world normal is zoom * R^T n
+        w = [cam_zoom * (n[0] * rows[0][a] + n[1] * rows[1][a] + n[2] * rows[2][a]) for a in range(3)]
+        planes.append((w[0], w[1], w[2], d))
+    return planes
+
+def clip_polygon(points):
+    """ Sutherland-Hodgman against CAM_PLANES; two points are clipped as a line segment """
+    closed = len(points) > 2
+    for (a, b, c), d in CAM_PLANES:
+        out = []
+        s = points[-1] if closed else None
+        ds = a * s[0] + b * s[1] + c * s[2] + d if closed else 0.0
+        for e in points:
+            de = a * e[0] + b * e[1] + c * e[2] + d
+            if s is not None and (ds < 0) != (de < 0): # Edge crosses the plane
+                t = ds / (ds - de)
+                out.append((s[0] + (e[0] - s[0]) * t, s[1] + (e[1] - s[1]) * t, s[2] + (e[2] - s[2]) * t))
+            if de >= 0: out.append(e)
+            s, ds = e, de
+        points = out
+        if len(points) < 2: return []
+    return points
+
+def clip_project(points):
+    """ Clips camera-space points [(x, y, z)] to the frustum and projects them:
+    (flat screen points, dists), or None if too little is left to draw """
+    points = clip_polygon(points)
+    if len(points) < 2: return None
+    cx, cy = WIDTH / 2, HEIGHT / 2
+    points_2d, dists = [], []
+    for x, y, z in points:
+        dist = FOV + z
+        factor = FOV / dist
+        points_2d += (cx + x * factor, cy + y * factor)
+        dists.append(dist)
+    return points_2d, dists
+
+# --- Level of Detail ---
+def select_lods(objects, members, cam_angle_x, cam_angle_y, cam_zoom):
+    """ Sets lod on the members with levels of detail from their radius on screen: the coarsest
+    level whose outline is off by at most LOD_ERROR_PX (a chord of an s-gon misses its circle
+    by r * (1 - cos(pi / s))). Going coarser needs LOD_HYSTERESIS of margin. Returns how many changed """
+    cos_y, sin_y = math.cos(cam_angle_y), math.sin(cam_angle_y)
+    cos_x, sin_x = math.cos(cam_angle_x), math.sin(cam_angle_x)
+    rz = (cos_x * sin_y * cam_zoom, sin_x * cam_zoom, cos_x * cos_y * cam_zoom)
+    changed = 0
+    for i in members:
+        obj = objects[i]
+        lods = obj.get_lods()
+        if not lods: continue
+        lo, hi = obj.world_bounds()
+        dist = FOV + sum(rz[a] * (lo[a] + hi[a]) / 2 for a in range(3)) # Camera distance of the centre
+        r_px = lods[0].shape[1] * obj.scale_val * cam_zoom * FOV / dist if dist > NEAR else math.inf
+
+        level = obj.lod
+        while level > 0 and r_px * (1 - math.cos(math.pi / lods[level].shape[3])) > LOD_ERROR_PX:
+            level -= 1
+        while (level + 1 < len(lods)
+               and r_px * (1 - math.cos(math.pi / lods[level + 1].shape[3])) * LOD_HYSTERESIS <= LOD_ERROR_PX):
+            level += 1
+        if level != obj.lod:
+            obj.lod = level
+            changed += 1
+    return changed
+
+# --- Scalar Pipeline ---
+def project_scalar(objects, members, cam_angle_x, cam_angle_y, cam_zoom, timer=None, culled=None):
+    """ Pure Python pipeline over objects[members], used when NumPy is not installed. culled: optional
+    Counter, gets the faces dropped as "backface" and "frustum" """
+    cx, cy = WIDTH / 2, HEIGHT / 2
+    
+    cos_y, sin_y = math.cos(cam_angle_y), math.sin(cam_angle_y)
+    cos_x, sin_x = math.cos(cam_angle_x), math.sin(cam_angle_x)
+
+    render_list = [] 
+    mesh_normals = {} # Camera-space normals, rotated once per shared mesh
+
+    for i in members:
+        obj = objects[i]
+        # 1. World Transform
+        world_verts = obj.get_world_verts()
+        if timer: timer.lap("world")
+        
+        # 2. Camera Transform
+        cam_verts = []
+        for v in world_verts:
+            # Rotate Y
+            x = v.x * cos_y - v.z * sin_y
+            z = v.x * sin_y + v.z * cos_y
+            # Rotate X
+            y = v.y * cos_x - z * sin_x
+            z = v.y * sin_x + z * cos_x
+            
+            # Zoom effect
+            x *= cam_zoom
+            y *= cam_zoom
+            z *= cam_zoom
+            
+            cam_verts.append(Vector3(x, y, z))
+
+        # Rotate the precomputed normals (no zoom, scale_val is uniform)
+        normals = mesh_normals.get(obj.mesh)
+        if normals is None:
+            normals = mesh_normals[obj.mesh] = []
+            for n in obj.normals:
+                nz = n.x * sin_y + n.z * cos_y
+                normals.append((n.x * cos_y - n.z * sin_y, n.y * cos_x - nz * sin_x, n.y * sin_x + nz * cos_x))
+        if timer: timer.lap("camera")
+
+        # 3. Faces Processing
+        projected = []
+        for fi, (sub_indices, color_arg) in enumerate(obj.faces):
+            nx, ny, nz = normals[fi]
+
+            # Backface Culling: the eye sits at (0, 0, -FOV) in camera space
+            v0 = cam_verts[sub_indices[0]]
+            if -v0.x * nx - v0.y * ny + (-FOV - v0.z) * nz < 0:
+                if culled is not None: culled["backface"] += 1
+                continue
+
+            sub_verts = [cam_verts[idx] for idx in sub_indices]
+            
+            points_2d = []
+            depth_sum = 0
+            inside = True
+            
+            for v in sub_verts:
+                dist = FOV + v.z # Moving camera back by FOV
+                if dist < NEAR:
+                    inside = False; break
+                factor = FOV / dist
+                px = cx + v.x * factor
+                py = cy + v.y * factor
+                if not (0 <= px <= WIDTH and 0 <= py <= HEIGHT): inside = False
+                points_2d += (px, py)
+                depth_sum += dist
+
+            n_pts = len(sub_verts)
+            if not inside:
+                # Crosses the near plane or a screen edge: keep only the part in view
+                res = clip_project([(v.x, v.y, v.z) for v in sub_verts])
+                if res is None or len(res[1]) < min(3, n_pts):
+                    if culled is not None: culled["frustum"] += 1
+                    continue
+                points_2d, dists = res
+                depth_sum, n_pts = sum(dists), len(dists)
+
+            if n_pts > 1:
+                projected.append((fi, color_arg, depth_sum / n_pts, points_2d))
+        if timer: timer.lap("projection")
+
+        # 4. Lighting (shading was tuned against the inward, winding-order normal)
+        tag = obj_tag(i)
+        for fi, color_arg, avg_depth, points_2d in projected:
+            if obj.is_line:
+                render_list.append((avg_depth, 2, points_2d, color_arg, tag, (i, fi)))
+                continue
+            nx, ny, nz = normals[fi]
+            intensity = -(nx * L_SOURCE.x + ny * L_SOURCE.y + nz * L_SOURCE.z)
+            val = 0.5 + (intensity * 0.5)
+            val = max(0.3, min(1.0, val))
+
+            shade_col = shade_color(color_arg, val)
+            render_list.append((avg_depth, 1, points_2d, shade_col, tag, (i, fi)))
+        if timer: timer.lap("shading")
+
+    return render_list
+
+# --- Batched Pipeline (NumPy) ---
+def view_matrix(cam_angle_x, cam_angle_y, cam_zoom):
+    """ 4x4 matrix doing camera rotate (Y then X), zoom and the perspective w = dist / FOV """
+    cos_y, sin_y = math.cos(cam_angle_y), math.sin(cam_angle_y)
+    cos_x, sin_x = math.cos(cam_angle_x), math.sin(cam_angle_x)
+    rx = [cos_y, 0.0, -sin_y]
+    ry = [-sin_x * sin_y, cos_x, -sin_x * cos_y]
+    rz = [cos_x * sin_y, sin_x, cos_x * cos_y]
+    m = np.zeros((4, 4))
+    m[0, :3] = rx
+    m[1, :3] = ry
+    m[2, :3] = rz
+    m[:3, :3] *= cam_zoom
+    m[3, :3] = m[2, :3] / FOV
+    m[3, 3] = 1.0  # w = (FOV + z) / FOV
+    return m
+
+class BatchedScene:
+    """ All scene vertices in one (N,3) array, faces as int index arrays grouped by vertex count """
+    def __init__(self, objects, members=None, static=None):
+        """ members: indices of the objects to include (default all). Objects with levels of
+        detail get every level, only the one their lod picks is drawn. static: a StaticMesh
+        whose already world-space faces are appended as one block, always drawn """
+        self.objects = objects
+        self.batches = []
+        self.groups, self.by_size = [], {} # FaceGroups, and the same by vertex count
+        self.has_lods = False
+        self.n_verts = self.n_faces = 0
+        self.depth_order = DepthOrder(0)
+        self.light = np.array([L_SOURCE.x, L_SOURCE.y, L_SOURCE.z])
+        self.static = None
+        self.members = set() # Objects added so far (the static block's aren't)
+        # Per-object transform and level of detail, cached: see update()
+        self.scale = np.ones(len(objects))
+        self.pos = np.zeros((len(objects), 3))
+        self.lod = np.zeros(len(objects), dtype=np.intp)
+        self.add(range(len(objects)) if members is None else members, static)
+
+    def add(self, members, static=None):
+        """ Appends objects (indices, none already in here) and optionally the StaticMesh block.
+        Existing vertex slots, face ids and the kept depth order are left as they are """
+        objects = self.objects
+        self.members.update(members)
+        self.update(members)
+        instances = {} # (Mesh, level or -1) -> indices of the objects using it
+        for i in members:
+            lods = objects[i].get_lods()
+            if lods:
+                for level, mesh in enumerate(lods): instances.setdefault((mesh, level), []).append(i)
+            else:
+                instances.setdefault((objects[i].full_mesh, -1), []).append(i)
+        self.has_lods = self.has_lods or any(level >= 0 for _, level in instances)
+
+        # One batch per unique mesh: its vertices are stored once and
+        # expanded per instance in world_verts()
+        groups = {}
+        base = self.n_verts
+        for (mesh, level), members in instances.items():
+            mesh_verts = np.frombuffer(mesh.vertex_buf, dtype=np.float32).reshape(-1, 3).astype(float)
+            self.batches.append((mesh_verts, np.array(members, dtype=np.intp), base, level))
+
+            # Split the mesh's faces by vertex count straight from its index buffer
+            index_buf = np.frombuffer(mesh.index_buf, dtype=np.int32)
+            start = np.frombuffer(mesh.face_start, dtype=np.int32)
+            normals = np.frombuffer(mesh.normal_buf, dtype=np.float32).reshape(-1, 3).astype(float)
+            colors = [mesh.palette[c] for c in mesh.color_idx]
+            by_size = []
+            sizes = np.diff(start)
+            for k in np.unique(sizes).tolist():
+                sel = np.flatnonzero(sizes == k)
+                by_size.append((k, sel.tolist(), index_buf[start[sel, None] + np.arange(k)], normals[sel]))
+
+            for i in members:
+                tag = obj_tag(i)
+                is_line = objects[i].is_line
+                for k, sel, rows, sel_normals in by_size:
+                    g = groups.get(k)
+                    if g is None: g = groups[k] = FaceGroup()
+                    g.idx.append(rows + base)
+                    g.colors.extend(colors[f] for f in sel)
+                    g.tags.extend([tag] * len(sel))
+                    g.is_line.extend([is_line] * len(sel))
+                    g.keys.extend((i, f) for f in sel)
+                    g.levels.extend([level] * len(sel))
+                    g.normals.append(sel_normals)
+                base += len(mesh_verts)
+
+        if static is not None:
+            self.static, self.static_start = static, base
+            index_buf = np.frombuffer(static.index_buf, dtype=np.int32)
+            start = np.frombuffer(static.face_start, dtype=np.int32)
+            normals = np.frombuffer(static.normal_buf).reshape(-1, 3)
+            sizes = np.diff(start)
+            for k in np.unique(sizes).tolist():
+                sel = np.flatnonzero(sizes == k).tolist()
+                g = groups.get(k)
+                if g is None: g = groups[k] = FaceGroup()
+                g.idx.append(index_buf[start[sel, None] + np.arange(k)] + base)
+                g.colors.extend(static.palette[static.color_idx[f]] for f in sel)
+                g.tags.extend(obj_tag(static.owner[f]) for f in sel)
+                g.is_line.extend(static.is_line[f] for f in sel)
+                g.keys.extend((static.owner[f], static.face[f]) for f in sel)
+                g.levels.extend([-1] * len(sel))
+                g.normals.append(normals[sel])
+            base += len(static.vertex_buf) // 3
+            self.static_end = base
+        self.n_verts = base
+
+        # New faces get the next DepthOrder ids and join the group of their vertex count
+        for k, g in groups.items():
+            g.freeze()
+            g.ids = np.arange(self.n_faces, self.n_faces + len(g.colors))
+            self.n_faces += len(g.colors)
+            if k in self.by_size:
+                self.by_size[k].extend(g)
+            else:
+                self.by_size[k] = g
+                self.groups.append(g)
+        self.depth_order.grow(self.n_faces)
+
+    def update(self, members):
+        """ Reloads the cached scale_val / pos of objects[members]: call it for every object
+        moved or rescaled since, world_verts() doesn't look at the objects themselves """
+        members = [i for i in members if i in self.members]
+        if not members: return
+        objs = [self.objects[i] for i in members]
+        self.scale[members] = [o.scale_val for o in objs]
+        self.pos[members] = [(o.pos.x, o.pos.y, o.pos.z) for o in objs]
+
+    def world_verts(self, visible=None, lod=None):
+        """ Scale + translate each mesh once per batch of instances. With a per-object bool mask
+        only visible instances are computed (and with per-object lod levels, only the level
+        drawn): returns (world, rows) where rows are their vertex slots, or None when world
+        holds every vertex """
+        scale, pos = self.scale, self.pos
+        if visible is None:
+            world = np.empty((self.n_verts, 3))
+            for mesh_verts, members, start, _ in self.batches:
+                block = mesh_verts[None] * scale[members, None, None] + pos[members, None]
+                world[start:start + block.shape[0] * block.shape[1]] = block.reshape(-1, 3)
+            if self.static is not None: world[self.static_start:self.static_end] = self.static_verts()
+            return world, None
+
+        parts, rows = [np.empty((0, 3))], [np.empty(0, dtype=np.intp)]
+        if self.static is not None:
+            parts.append(self.static_verts())
+            rows.append(np.arange(self.static_start, self.static_end))
+        for mesh_verts, members, start, level in self.batches:
+            active = visible[members]
+            if level >= 0 and lod is not None: active = active & (lod[members] == level)
+            sel = np.flatnonzero(active)
+            if not len(sel): continue
+            inst = members[sel]
+            parts.append((mesh_verts[None] * scale[inst, None, None] + pos[inst, None]).reshape(-1, 3))
+            rows.append((start + sel[:, None] * len(mesh_verts) + np.arange(len(mesh_verts))).ravel())
+        return np.concatenate(parts), np.concatenate(rows)
+
+    def static_verts(self):
+        """ The StaticMesh block, as is: its topology is fixed, only positions change on rebuild """
+        self.static.refresh()
+        return np.frombuffer(self.static.vertex_buf).reshape(-1, 3)
+
+    def project_faces(self, cam_angle_x, cam_angle_y, cam_zoom, visible=None, timer=None, culled=None):
+        """ Yields (group, faces, screen (F,k,2), face_dist (F,k), levels (F,)) per face group,
+        keeping only front-facing faces fully in front of the camera. visible: optional bool
+        mask over objects, culled objects get no vertex work at all. culled: as in project_scalar """
+        cx, cy = WIDTH / 2, HEIGHT / 2
+        lod = None
+        if self.has_lods:
+            if visible is None: visible = np.ones(len(self.objects), dtype=bool)
+            shown = np.flatnonzero(visible) # Levels only matter where drawn, only read those
+            self.lod[shown] = [self.objects[i].lod for i in shown.tolist()]
+            lod = self.lod
+        if visible is not None and self.static is not None:
+            visible = visible.copy()
+            visible[self.static.members] = True # Merged statics bypass the object cull
+        world, rows = self.world_verts(visible, lod)
+        if rows is not None:
+            slot = np.empty(self.n_verts, dtype=np.intp) # Vertex index -> row in the compact world array
+            slot[rows] = np.arange(len(rows))
+        if timer: timer.lap("world")
+        homo = np.empty((len(world), 4))
+        homo[:, :3] = world
+        homo[:, 3] = 1.0
+        view = view_matrix(cam_angle_x, cam_angle_y, cam_zoom)
+        clip = homo @ view.T
+
+        cam = clip[:, :3]
+        dist = clip[:, 3] * FOV
+        plane_n = np.array([n for n, _ in CAM_PLANES], dtype=float)
+        side = cam @ plane_n.T + np.array([d for _, d in CAM_PLANES]) # (N,5) signed plane distances
+        rot = view[:3, :3] / cam_zoom
+        eye = np.array([0.0, 0.0, -FOV])
+        if timer: timer.lap("camera")
+        screen = np.empty((len(clip), 2))
+        screen[:, 0] = cx + clip[:, 0] / clip[:, 3]
+        screen[:, 1] = cy + clip[:, 1] / clip[:, 3]
+        if timer: timer.lap("projection")
+
+        for g in self.groups:
+            if g.idx.shape[1] < 2: continue
+            faces, idx, normals = None, g.idx, g.normals
+            if rows is not None:
+                active = visible[g.owner]
+                if lod is not None: active = active & ((g.levels < 0) | (g.levels == lod[g.owner]))
+                faces = np.flatnonzero(active)
+                idx, normals = slot[g.idx[faces]], g.normals[faces]
+
+            # Back-face culling before any per-face projection or shading
+            n_cam = normals @ rot.T
+            facing = np.flatnonzero(((eye - cam[idx[:, 0]]) * n_cam).sum(axis=1) >= 0)
+            faces = facing if faces is None else faces[facing]
+            sub, n_cam = idx[facing], n_cam[facing]
+
+            # Drop faces outside one frustum plane, keep those inside all of them as they are
+            face_side = side[sub]
+            inside = (face_side >= 0).all(axis=(1, 2))
+            keep = np.flatnonzero(inside | ~(face_side < 0).all(axis=1).any(axis=1))
+            if culled is not None:
+                culled["backface"] += len(idx) - len(facing)
+                culled["frustum"] += len(facing) - len(keep)
+            faces, sub, n_cam, inside = faces[keep], sub[keep], n_cam[keep], inside[keep]
+            if timer: timer.lap("camera")
+            if not len(faces): continue
+
+            # Shading was tuned against the inward (winding) normal
+            val = np.clip(0.5 - (n_cam @ self.light) * 0.5, 0.3, 1.0)
+            levels = np.rint(val * SHADE_LEVELS).astype(int)
+            if timer: timer.lap("shading")
+            whole = np.flatnonzero(inside)
+            if len(whole):
+                yield g, faces[whole], screen[sub[whole]], dist[sub[whole]], levels[whole]
+
+            # The few faces crossing the frustum are clipped one by one, regrouped by their new vertex count
+            clipped = {}
+            for j in np.flatnonzero(~inside).tolist():
+                res = clip_project(cam[sub[j]].tolist())
+                if res is not None and len(res[1]) >= min(3, g.idx.shape[1]):
+                    clipped.setdefault(len(res[1]), []).append((j, res[0], res[1]))
+                elif culled is not None:
+                    culled["frustum"] += 1
+            if timer: timer.lap("projection")
+            for k, items in clipped.items():
+                js = [j for j, _, _ in items]
+                pts = np.array([p for _, p, _ in items]).reshape(-1, k, 2)
+                yield g, faces[js], pts, np.array([d for _, _, d in items]), levels[js]
+
+    def project(self, cam_angle_x, cam_angle_y, cam_zoom, visible=None, timer=None, culled=None):
+        """ Same render_list as project_scalar, computed with array ops, but already sorted furthest first """
+        render_list = []
+        depth_parts, id_parts = [], []
+        for g, faces, pts, face_dist, levels in self.project_faces(cam_angle_x, cam_angle_y, cam_zoom, visible, timer, culled):
+            depth = face_dist.mean(axis=1)
+            depth_parts.append(depth)
+            id_parts.append(g.ids[faces])
+            avg_depth = depth.tolist()
+            pts = pts.reshape(len(pts), -1).tolist()
+            faces = faces.tolist()
+            colors, tags, keys, is_line = g.colors, g.tags, g.keys, g.is_line
+            if timer: timer.lap("projection")
+            shaded = [colors[f] if is_line[f] else shade_level(colors[f], level)
+                      for f, level in zip(faces, levels.tolist())]
+            if timer: timer.lap("shading")
+            for j, f in enumerate(faces):
+                render_list.append((avg_depth[j], 2 if is_line[f] else 1, pts[j], shaded[j], tags[f], keys[f]))
+            if timer: timer.lap("projection")
+
+        if render_list:
+            order = self.depth_order.sort(np.concatenate(id_parts), np.concatenate(depth_parts))
+            render_list = list(map(render_list.__getitem__, order.tolist()))
+        if timer: timer.lap("sort")
+        return render_list
+
+    def rasterize(self, zbuf, cam_angle_x, cam_angle_y, cam_zoom, visible=None, culled=None):
+        """ Draws the polygon faces into a zbuffer.ZBuffer (lines are skipped), returns how many.
+        A buffer of another size gets the same WIDTH x HEIGHT view, resampled """
+        zbuf.clear()
+        resize = np.array([zbuf.width / WIDTH, zbuf.height / HEIGHT])
+        drawn = 0
+        for g, faces, pts, face_dist, levels in self.project_faces(cam_angle_x, cam_angle_y, cam_zoom, visible, culled=culled):
+            solid = ~g.is_line[faces]
+            faces, pts, face_dist, levels = faces[solid], pts[solid], face_dist[solid], levels[solid]
+            if (resize != 1).any(): pts = pts * resize
+            rgb = g.rgb[faces] * (levels[:, None] / SHADE_LEVELS)
+            zbuf.draw_polygons(pts, face_dist, rgb.astype(np.uint8), g.owner[faces])
+            drawn += len(faces)
+        return drawn
+
+class FaceGroup:
+    """ Faces sharing a vertex count, as parallel per-face columns """
+    def __init__(self):
+        self.idx, self.normals = [], []  # Arrays per instance, concatenated by freeze()
+        self.colors, self.tags, self.is_line, self.keys = [], [], [], []
+        self.levels = [] # Level of detail the face belongs to, -1 = drawn at every level
+
+    def freeze(self):
+        self.idx = np.concatenate(self.idx).astype(np.intp)      # (F,k) vertex indices
+        self.normals = np.concatenate(self.normals)              # (F,3) object-space normals
+        self.is_line = np.array(self.is_line, dtype=bool)
+        self.levels = np.array(self.levels, dtype=np.intp)
+        self.owner = np.array([key[0] for key in self.keys], dtype=np.int32)
+        # Named Tk colours have no parsed RGB, render them mid grey
+        self.rgb = np.array([parse_color(c) or (128, 128, 128) for c in self.colors], dtype=float).reshape(-1, 3)
+        return self
+
+    def extend(self, other):
+        """ Appends the faces of another frozen group of the same vertex count """
+        for name in ("idx", "normals", "is_line", "levels", "owner", "rgb", "ids"):
+            setattr(self, name, np.concatenate([getattr(self, name), getattr(other, name)]))
+        self.colors += other.colors
+        self.tags += other.tags
+        self.keys += other.keys
+
+# --- Static Geometry ---
+class StaticMesh:
+    """ Every object flagged static merged into one world-space mesh (scale and position
+    applied) with per-face columns: color_idx into palette, owner (object index), face (index
+    in the owner's mesh) and is_line. Only rebuilt when one of them changes, e.g. on select """
+    def __init__(self, objects, members):
+        self.objects, self.members = objects, members
+        self.versions = None # Object versions the arrays were built from
+        self.version = 0     # Bumped on every rebuild, for consumers to compare against
+        self.refresh()
+
+    def refresh(self):
+        versions = [self.objects[i].version for i in self.members]
+        if versions == self.versions: return
+        self.versions = versions
+        self.version += 1
+        self.vertex_buf, self.normal_buf = array.array("d"), array.array("d") # xyz per vertex / face
+        self.index_buf, self.face_start = array.array("i"), array.array("i", [0])
+        self.color_idx, self.owner, self.face = array.array("H"), array.array("i"), array.array("i")
+        self.is_line = []
+        palette = {}
+        for i in self.members:
+            obj = self.objects[i]
+            base = len(self.vertex_buf) // 3
+            for v in obj.get_world_verts(): self.vertex_buf.extend((v.x, v.y, v.z))
+            for fi, (sub_indices, color) in enumerate(obj.faces):
+                self.index_buf.extend(k + base for k in sub_indices)
+                self.face_start.append(len(self.index_buf))
+                self.color_idx.append(palette.setdefault(color, len(palette)))
+                self.owner.append(i)
+                self.face.append(fi)
+            self.normal_buf.fromlist(obj.mesh.normal_buf.tolist()) # Uniform scale: object normals hold
+            self.is_line.extend([obj.is_line] * len(obj.faces))
+        self.palette = list(palette)
+        self.n_faces = len(self.color_idx)
+
+class StaticScene:
+    """ World-space faces of a StaticMesh in a BSPTree, walked back to front every frame """
+    def __init__(self, static):
+        self.static = static
+        self.objects, self.members = static.objects, static.members
+        self.tree = None
+        self.built = None # StaticMesh version the tree was built from
+        self.n_polys = 0
+
+    def refresh(self):
+        """ (Re)builds the tree, only when a static object was actually moved or scaled """
+        static = self.static
+        static.refresh()
+        if static.version == self.built: return
+        self.built = static.version
+        polys = []
+        vb, nb, idx, start = static.vertex_buf, static.normal_buf, static.index_buf, static.face_start
+        for f in range(static.n_faces):
+            sub_indices = idx[start[f]:start[f + 1]]
+            if len(sub_indices) < 3 or static.is_line[f]: continue
+            points = [(vb[3 * k], vb[3 * k + 1], vb[3 * k + 2]) for k in sub_indices]
+            i = static.owner[f]
+            data = (static.palette[static.color_idx[f]], obj_tag(i), i, static.face[f])
+            polys.append(Poly(points, (nb[3 * f], nb[3 * f + 1], nb[3 * f + 2]), data))
+        self.tree = BSPTree(polys)
+        self.n_polys = len(polys)
+
+    def merge(self, render_list, cam_angle_x, cam_angle_y, cam_zoom, culled=None):
+        """ Static faces in BSP order, each dynamic render_list item placed in the cell holding its
+        object; render_list must be sorted furthest first, each cell keeps that order. culled: as in
+        project_scalar, a static face counts once however many pieces the tree split it into """
+        self.refresh()
+        cos_y, sin_y = math.cos(cam_angle_y), math.sin(cam_angle_y)
+        cos_x, sin_x = math.cos(cam_angle_x), math.sin(cam_angle_x)
+        e = -FOV / cam_zoom # Eye at (0, 0, -FOV) in camera space, rotated back to world
+        eye = (e * cos_x * sin_y, e * sin_x, e * cos_x * cos_y)
+
+        cells, cell_of = {}, {}
+        for item in render_list:
+            i = item[5][0]
+            cell = cell_of.get(i)
+            if cell is None:
+                p = self.objects[i].pos
+                cell = cell_of[i] = self.tree.locate((p.x, p.y, p.z))
+            cells.setdefault(cell, []).append(item)
+
+        out = []
+        fragment = {} # Split faces get one canvas item per piece
+        shown, missed = set(), set() # Faces with a piece in view / with none, the walk skips back faces
+        for node in self.tree.walk(eye):
+            if isinstance(node, int):
+                items = cells.get(node)
+                if items: out += items
+                continue
+
+            color_arg, tag, i, fi = node.data
+            k = fragment[i, fi] = fragment.get((i, fi), -1) + 1
+            cam_points = []
+            for x, y, z in node.points:
+                rz = x * sin_y + z * cos_y
+                cam_points.append(((x * cos_y - z * sin_y) * cam_zoom, (y * cos_x - rz * sin_x) * cam_zoom,
+                                   (y * sin_x + rz * cos_x) * cam_zoom))
+            res = clip_project(cam_points)
+            if res is None or len(res[1]) < 3:
+                missed.add((i, fi))
+            else:
+                shown.add((i, fi))
+                points_2d, dists = res
+                n = node.normal
+                nz = n[0] * sin_y + n[2] * cos_y
+                intensity = -((n[0] * cos_y - n[2] * sin_y) * L_SOURCE.x
+                              + (n[1] * cos_x - nz * sin_x) * L_SOURCE.y
+                              + (n[1] * sin_x + nz * cos_x) * L_SOURCE.z)
+                val = max(0.3, min(1.0, 0.5 + intensity * 0.5))
+                out.append((sum(dists) / len(dists), 1, points_2d, shade_color(color_arg, val), tag, (i, fi, k)))
+        if culled is not None:
+            culled["backface"] += self.n_polys - len(fragment)
+            culled["frustum"] += len(missed - shown)
+        return out
+
+# --- Canvas Tags ---
+OBJ_TAGS = [] # OBJ_TAGS[i] is "obj:<i>", each tag string is made once
+
+def obj_tag(i):
+    if i >= len(OBJ_TAGS): OBJ_TAGS.extend(f"obj:{k}" for k in range(len(OBJ_TAGS), i + 1))
+    return OBJ_TAGS[i]
+
+# --- Picking ---
+def point_in_polygon(x, y, pts):
+    """ Even-odd test against a flat [x0, y0, x1, y1, ...] polygon """
+    inside = False
+    n = len(pts)
+    x1, y1 = pts[n - 2], pts[n - 1]
+    for k in range(0, n, 2):
+        x2, y2 = pts[k], pts[k + 1]
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+class PickGrid:
+    """ Spatial hash of the drawn faces' screen bounds. A pick tests only the faces in one cell,
+    front-most first, so it never returns a face hidden under another one """
+    def __init__(self, cell=PICK_CELL):
+        self.cell = cell
+        self.render_list = []
+        self.cells = None
+
+    def reset(self, render_list):
+        """ render_list as drawn (furthest first); the hash is built on the next pick """
+        self.render_list = render_list
+        self.cells = None
+
+    def build(self):
+        c = self.cell
+        cells = {}
+        for n, item in enumerate(self.render_list):
+            if item[1] != 1: continue # Lines can't be selected
+            pts = item[2]
+            xs, ys = pts[0::2], pts[1::2]
+            for gx in range(int(min(xs) // c), int(max(xs) // c) + 1):
+                for gy in range(int(min(ys) // c), int(max(ys) // c) + 1):
+                    cells.setdefault((gx, gy), []).append(n)
+        self.cells = cells
+
+    def pick(self, x, y):
+        """ Object index of the front-most face under (x, y), -1 if none """
+        if self.cells is None: self.build()
+        for n in reversed(self.cells.get((int(x // self.cell), int(y // self.cell)), ())):
+            item = self.render_list[n]
+            if point_in_polygon(x, y, item[2]): return item[5][0]
+        return -1
+
+# --- Scene ---
+def build_scene():
+    """ The living room as a list of Object3D, no Tk needed """
+    objects = []
+    # Palette - Modern Scandi
+    C_WALL_BACK = "#B0BEC5"   # Cool Grey
+    C_WALL_SIDE = "#CFD8DC"   # Lighter Grey
+    C_FLOOR = "#D7CCC8"       # Light Wood
+    C_SOFA_MAIN = "#263238"   # Dark Blue/Grey
+    C_SOFA_ACCENT = "#546E7A" # Lighter Blue/Grey
+    C_TABLE_TOP = "#ECEFF1"   # White Marble
+    C_LEG = "#3E2723"         # Dark Wood
+    C_LAMP_SHADE = "#FFECB3"  # Warm Light
+    C_PLANT_POT = "#EFEBE9"   
+
+    # 1. Room Shell
+    # Floor (Large plate)
+    m = get_mesh("box", 1200, 20, 1000, C_FLOOR)
+    objects.append(Object3D("Floor", m, None, Vector3(0, FLOOR_Y+10, 0), static=True))
+    
+    # Walls
+    m = get_mesh("box", 1200, 600, 20, C_WALL_BACK) 
+    objects.append(Object3D("Back Wall", m, None, Vector3(0, -150, -400), static=True)) # Back
+
+    m = get_mesh("box", 20, 600, 1000, C_WALL_SIDE)
+    objects.append(Object3D("Left Wall", m, None, Vector3(-600, -150, 0), static=True)) # Left
+
+    # Baseboards (Skirtings)
+    m = get_mesh("box", 1200, 15, 5, "#FFFFFF")
+    objects.append(Object3D("Baseboard Back", m, None, Vector3(0, FLOOR_Y-5, -390), static=True))
+
+    # 2. Main Sofa (3-Seater) - Centered
+    # Seat Base
+    m = get_mesh("box", 320, 45, 100, C_SOFA_MAIN)
+    objects.append(Object3D("Sofa Base", m, None, Vector3(0, FLOOR_Y-30, -100)))
+    # Backrest
+    m = get_mesh("box", 320, 90, 30, C_SOFA_MAIN)
+    objects.append(Object3D("Sofa Back", m, None, Vector3(0, FLOOR_Y-70, -145)))
+    # Armrests
+    m = get_mesh("box", 30, 70, 105, C_SOFA_ACCENT)
+    objects.append(Object3D("Arm Left", m, None, Vector3(-175, FLOOR_Y-50, -100)))
+    objects.append(Object3D("Arm Right", m, None, Vector3(175, FLOOR_Y-50, -100)))
+    # Cushions
+    m = get_mesh("box", 280, 15, 80, C_SOFA_ACCENT)
+    objects.append(Object3D("Cushion", m, None, Vector3(0, FLOOR_Y-55, -100)))
+
+    # 3. Modern Coffee Table - In front of Sofa
+    # Top
+    m = get_mesh("box", 160, 5, 90, C_TABLE_TOP)
+    objects.append(Object3D("Table Top", m, None, Vector3(0, FLOOR_Y-50, 50)))
+    # Legs
+    leg_mesh = get_mesh("box", 8, 45, 8, "#37474F") # Metal legs
+    for lx in [-70, 70]:
+        for lz in [20, 80]:
+            objects.append(Object3D("Table Leg", leg_mesh, None, Vector3(lx, FLOOR_Y-25, lz)))
+
+    # 4. Standing Art/Decor (Right Side)
+    m = get_mesh("box", 80, 120, 5, "#4E342E") # Frame
+    objects.append(Object3D("Art Frame", m, None, Vector3(300, FLOOR_Y-60, -380), static=True))
+    m = get_mesh("box", 70, 110, 2, "#FFCC80") # Canvas
+    objects.append(Object3D("Art Canvas", m, None, Vector3(300, FLOOR_Y-60, -376), static=True))
+
+    # 5. Plant / Tall Vase (Left Corner)
+    # Pot
+    m = get_mesh("cylinder", 25, 60, 12, C_PLANT_POT)
+    objects.append(Object3D("Vase", m, None, Vector3(-350, FLOOR_Y-30, -320)))
+    # Plant Stem
+    m = get_mesh("box", 5, 120, 5, "#2E7D32")
+    objects.append(Object3D("Plant", m, None, Vector3(-350, FLOOR_Y-90, -320)))
+    # Leaves
+    m = get_mesh("box", 60, 2, 40, "#4CAF50")
+    objects.append(Object3D("Leaf", m, None, Vector3(-330, FLOOR_Y-130, -320)))
+    objects.append(Object3D("Leaf", m, None, Vector3(-370, FLOOR_Y-110, -320)))
+
+    # 6. Floor Lamp (Right Front)
+    m = get_mesh("cylinder", 5, 200, 6, "#BDBDBD") # Pole
+    objects.append(Object3D("Lamp Pole", m, None, Vector3(400, FLOOR_Y-100, 100)))
+    m = get_mesh("cylinder", 30, 5, 10, "#424242") # Base
+    objects.append(Object3D("Lamp Base", m, None, Vector3(400, FLOOR_Y-2, 100)))
+    m = get_mesh("cylinder", 40, 50, 12, C_LAMP_SHADE) # Shade
+    objects.append(Object3D("Lamp Shade", m, None, Vector3(400, FLOOR_Y-200, 100)))
+    
+    # 7. Rug
+    m = get_mesh("box", 400, 2, 250, "#B0BEC5")
+    objects.append(Object3D("Rug", m, None, Vector3(0, FLOOR_Y-1, 0), static=True)) # Rests on the floor top (y = FLOOR_Y)
+    return objects
+
+# --- Scene Files ---
+# A layout is JSON:
+#   {"version": 1,
+#    "colors": {"floor": "#D7CCC8"},                            (optional names for colours)
+#    "shapes": {"floor": {"box": [1200, 20, 1000], "color": "floor"},
+#               "vase": {"cylinder": [25, 60, 12], "color": "#EFEBE9"},
+#               "scan": {"buffers": {...}, "palette": [...], "lo": [...], "hi": [...]}},
+#    "objects": [{"name": "Floor", "shape": "floor", "pos": [0, 160, 0], "static": true},
+#                {"name": "Table Leg", "shape": "leg", "instances": [[-70, 125, 20], [70, 125, 20]]}],
+#    "sidecar": "room.bin"}                                     (only for "buffers" shapes)
+# "buffers" maps each Mesh buffer to [byte offset, count] in the little-endian sidecar file.
+SCENE_VERSION = 1
+SIDECAR_BUFFERS = (("vertex_buf", "f"), ("index_buf", "i"), ("face_start", "i"), ("color_idx", "H"))
+
+def read_sidecar(path, shape):
+    """ Mesh from the byte ranges a "buffers" shape gives in the sidecar file """
+    bufs = []
+    with open(path, "rb") as f:
+        for name, typecode in SIDECAR_BUFFERS:
+            offset, count = shape["buffers"][name]
+            buf = array.array(typecode)
+            f.seek(offset)
+            buf.frombytes(f.read(count * buf.itemsize))
+            if sys.byteorder == "big": buf.byteswap()
+            bufs.append(buf)
+    return Mesh.from_buffers(*bufs, shape["palette"])
+
+def load_scene(path):
+    """ Object3Ds of a JSON layout. Each shape is one MeshRef shared by all its objects, built
+    (or read from the sidecar) the first time one of them is drawn """
+    with open(path) as f:
+        doc = json.load(f)
+    if doc.get("version", SCENE_VERSION) > SCENE_VERSION:
+        raise ValueError(f"{path}: scene version {doc['version']} is newer than {SCENE_VERSION}")
+    colors = doc.get("colors", {})
+    sidecar = os.path.join(os.path.dirname(path), doc["sidecar"]) if doc.get("sidecar") else None
+
+    refs = {}
+    for name, shape in doc["shapes"].items():
+        if "buffers" in shape:
+            refs[name] = MeshRef(functools.partial(read_sidecar, sidecar, shape), tuple(shape["lo"]), tuple(shape["hi"]))
+            continue
+        kind = next((k for k in MESH_SHAPES if k in shape), None)
+        if kind is None:
+            raise ValueError(f"{path}: shape {name!r} needs one of {', '.join(MESH_SHAPES)} or buffers")
+        refs[name] = lazy_mesh(kind, *shape[kind], colors.get(shape["color"], shape["color"]))
+
+    objects = []
+    for entry in doc["objects"]:
+        ref = refs[entry["shape"]]
+        for x, y, z in entry.get("instances") or [entry["pos"]]:
+            objects.append(Object3D(entry["name"], ref, None, Vector3(x, y, z),
+                                    is_line=entry.get("line", False), static=entry.get("static", False)))
+    return objects
+
+def save_scene(objects, path, sidecar=None):
+    """ Writes objects as a layout load_scene() reads back. get_mesh() meshes become shape
+    references, other meshes go to the sidecar (default: path with .bin). Consecutive
+    objects that differ only in position are written once, as instances """
+    shapes, shape_of, entries, blobs = {}, {}, [], []
+    offset = 0
+    for obj in objects:
+        mesh = obj.full_mesh
+        name = shape_of.get(mesh)
+        if name is None:
+            base = name = obj.name.lower().replace(" ", "_")
+            while name in shapes: name = f"{base}_{len(shapes)}"
+            shape_of[mesh] = name
+            key = mesh.shape
+            if key is not None:
+                shapes[name] = {key[0]: list(key[1:-1]), "color": key[-1]}
+            else:
+                buffers = {}
+                for attr, typecode in SIDECAR_BUFFERS:
+                    buf = array.array(typecode, getattr(mesh, attr))
+                    if sys.byteorder == "big": buf.byteswap()
+                    buffers[attr] = [offset, len(buf)]
+                    blobs.append(buf.tobytes())
+                    offset += len(blobs[-1])
+                shapes[name] = {"buffers": buffers, "palette": mesh.palette, "lo": list(mesh.lo), "hi": list(mesh.hi)}
+
+        entry = {"name": obj.name, "shape": name}
+        if obj.static: entry["static"] = True
+        if obj.is_line: entry["line"] = True
+        pos = [obj.pos.x, obj.pos.y, obj.pos.z]
+        last = entries[-1] if entries else None
+        if last is not None and {k: v for k, v in last.items() if k not in ("pos", "instances")} == entry:
+            if "pos" in last: last["instances"] = [last.pop("pos")]
+            last["instances"].append(pos)
+        else:
+            entry["pos"] = pos
+            entries.append(entry)
+
+    doc = ['{"version": %d,' % SCENE_VERSION]
+    if blobs:
+        sidecar = sidecar or os.path.splitext(path)[0] + ".bin"
+        with open(sidecar, "wb") as f:
+            for blob in blobs: f.write(blob)
+        doc.append(' "sidecar": %s,' % json.dumps(os.path.relpath(sidecar, os.path.dirname(path) or ".")))
+    # One shape / object per line keeps layouts readable and diffable
+    doc.append(' "shapes": {\n  ' + ",\n  ".join(f"{json.dumps(k)}: {json.dumps(v)}" for k, v in shapes.items()) + "},")
+    doc.append(' "objects": [\n  ' + ",\n  ".join(json.dumps(e) for e in entries) + "]}")
+    with open(path, "w") as f:
+        f.write("\n".join(doc) + "\n")
+
+# --- Frame ---
+class SceneState:
+    """ The objects and everything a frame is computed from besides the camera: static objects
+    merged into one world-space mesh (walked through a BSP tree on the canvas, else one block of
+    the batch), an octree over the rest and the batched pipeline. No Tk in here, the viewer,
+    bench.py and headless.py all draw it with render_frame() """
+    def __init__(self, objects, use_bsp=USE_BSP, use_octree=USE_OCTREE, batched=None):
+        """ batched: NumPy pipeline instead of the scalar one, default when NumPy is installed """
+        self.objects = objects
+        self.batched = np is not None if batched is None else batched
+        static = [i for i, o in enumerate(objects) if o.static]
+        if not use_bsp and not self.batched: static = [] # The scalar pipeline draws them like the rest
+        self.static_mesh = StaticMesh(objects, static) if static else None
+        self.static_scene = StaticScene(self.static_mesh) if static and use_bsp else None
+        static = set(static)
+        self.dynamic = [i for i in range(len(objects)) if i not in static]
+        self.batch = self.build_batch() if self.batched else None
+
+        # The rest go in an octree, culled against the view frustum before any vertex work
+        self.octree = None
+        self.moved = set() # Objects whose transform changed since the last frame
+        self.index_of = {obj: i for i, obj in enumerate(objects)}
+        if use_octree:
+            self.octree = Octree()
+            for i in self.dynamic:
+                self.octree.insert(i, *objects[i].world_bounds())
+
+    def visible_objects(self, cam_angle_x, cam_angle_y, cam_zoom):
+        """ Indices of the non-static objects whose bounds reach into the view frustum """
+        moved = [self.index_of[obj] for obj in self.moved]
+        self.moved.clear()
+        if self.batch is not None: self.batch.update(moved)
+        if self.octree is None: return self.dynamic
+        for i in moved:
+            if i in self.octree.boxes: self.octree.update(i, *self.objects[i].world_bounds())
+        return sorted(self.octree.query(frustum_planes(cam_angle_x, cam_angle_y, cam_zoom)))
+
+    def build_batch(self):
+        """ BatchedScene of the dynamic objects whose mesh exists, unbuilt ones join once seen """
+        static = self.static_mesh if self.static_scene is None else None
+        return BatchedScene(self.objects, [i for i in self.dynamic if self.objects[i].built], static)
+
+    def build_visible(self, members):
+        """ Builds the meshes of lazily loaded objects coming into view and adds every object not
+        in the batch yet, whether its (shared) mesh was built now or earlier for another object """
+        for i in members:
+            if not self.objects[i].built: self.objects[i].full_mesh
+        if self.batch is None: return
+        missing = [i for i in members if i not in self.batch.members]
+        if missing: self.batch.add(missing) # Once per frame, the rest of the batch stays
+
+class Frame:
+    """ What render_frame() produced: render_list furthest first (empty when rasterized), the
+    dynamic objects it was culled down to, items / faces drawn, how many items were sorted and the
+    culled faces by stage (None unless asked for) """
+    __slots__ = ("render_list", "members", "drawn", "sort_size", "culled")
+    def __init__(self, render_list, members, drawn, sort_size, culled=None):
+        self.render_list, self.members, self.drawn, self.sort_size = render_list, members, drawn, sort_size
+        self.culled = culled
+
+def render_frame(scene, cam_angle_x, cam_angle_y, cam_zoom, zbuf=None, timer=None, count_culled=False):
+    """ One frame of a SceneState: cull, level of detail, project, shade and sort, then either a
+    render_list for the canvas (CanvasPool.sync) or, given a zbuffer.ZBuffer, the faces
+    rasterized into it (batched pipeline only). count_culled: fill Frame.culled, counted by
+    "octree", "backface" and "frustum" where each of them drops the faces """
+    members = scene.visible_objects(cam_angle_x, cam_angle_y, cam_zoom)
+    culled = collections.Counter() if count_culled else None
+    if culled is not None and scene.octree is not None:
+        # Whole objects outside the frustum, those never built have no faces to count yet
+        shown, objects = set(members), scene.objects
+        culled["octree"] = sum(len(objects[i].mesh.color_idx) for i in scene.dynamic
+                               if i not in shown and objects[i].built)
+    scene.build_visible(members)
+    select_lods(scene.objects, members, cam_angle_x, cam_angle_y, cam_zoom)
+    mask = None
+    if scene.batch is not None and scene.octree is not None:
+        mask = np.zeros(len(scene.objects), dtype=bool)
+        mask[members] = True
+    if timer: timer.lap("cull")
+
+    if zbuf is not None:
+        # Depth test per pixel, no sort
+        drawn = scene.batch.rasterize(zbuf, cam_angle_x, cam_angle_y, cam_zoom, mask, culled)
+        if timer: timer.lap("raster")
+        return Frame([], members, drawn, 0, culled)
+
+    if scene.batch is not None:
+        render_list = scene.batch.project(cam_angle_x, cam_angle_y, cam_zoom, mask, timer, culled)
+    else:
+        render_list = project_scalar(scene.objects, members, cam_angle_x, cam_angle_y, cam_zoom, timer, culled)
+
+    sort_size = len(render_list)
+    if scene.batch is None:
+        # Sort by depth (Furthest first); the batched pipeline keeps its order between frames
+        render_list.sort(key=DEPTH, reverse=True)
+    if scene.static_scene is not None:
+        # Static faces come out of the BSP already ordered, dynamic ones slot in
+        render_list = scene.static_scene.merge(render_list, cam_angle_x, cam_angle_y, cam_zoom, culled)
+    if timer: timer.lap("sort")
+    return Frame(render_list, members, len(render_list), sort_size, culled)
+
+def frame_counters(scene, frame):
+    """ HUD / CSV / bench counters of a frame rendered with count_culled (frame_ms and
+    dropped_frames are the caller's). Submitted faces are those reaching the octree or, for
+    statics, the BSP walk / batch """
+    objects, culled = scene.objects, frame.culled
+    submitted = sum(len(objects[i].mesh.color_idx) for i in frame.members) + culled["octree"]
+    n_objects = len(frame.members)
+    if scene.static_scene is not None:
+        submitted += scene.static_scene.n_polys # Lines are not in the tree
+        n_objects += len(scene.static_mesh.members)
+    elif scene.static_mesh is not None:
+        submitted += scene.static_mesh.n_faces
+        n_objects += len(scene.static_mesh.members)
+    return {"objects": n_objects, "faces_submitted": submitted, "faces_culled": sum(culled.values()),
+            "culled_backface": culled["backface"], "culled_frustum": culled["frustum"],
+            "culled_octree": culled["octree"], "sort_size": frame.sort_size}
+
 # --- Engine & UI ---
 class LivingRoomApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, scene_file=SCENE_FILE):
+        """ scene_file: JSON layout (see load_scene), None for the built-in room """
         super().__init__()
         self.title("Modern 3D Interactive Room Concept")
         self.geometry(f"{WIDTH}x{HEIGHT}")
@@ -140,23 +1475,59 @@ class LivingRoomApp(tk.Tk):
         self.label_info = tk.Label(self, text="Click objects to interact | Arrow keys to rotate", 
                                  font=("Helvetica", 12), bg="white", relief="solid", padx=10, pady=5)
         self.label_info.place(x=20, y=HEIGHT-50)
+        self.info_text = self.label_info.cget("text")
+        self.hover = -1
+
+        # Performance overlay (HUD_KEY) and counters, only gathered while shown or exported
+        self.hud = tk.Label(self, font=("Courier", 10), justify="left", bg="black", fg="#00E676", padx=6, pady=4)
+        self.hud_shown = False
+        self.stats = FrameStats()
+        if STATS_CSV:
+            self.stats.export_csv(open(STATS_CSV, "w", newline=""))
 
         # Camera
         self.cam_angle_y = -0.6 # Initial view angle
         self.cam_angle_x = 0.35 # High angle
         self.keys_pressed = {}
 
+        # Redraw state: draw only when dirty, tick only while something moves
+        self.dirty = True
+        self.loop_id = None
+        # Frame pacing: simulation advances in SIM_STEP steps of real time
+        self.last_tick = None   # perf_counter() of the previous tick, None while idle
+        self.lag = 0.0          # Real time not yet simulated
+        self.moving = False
+        self.dropped_frames = 0 # Steps whose frame was never rendered (coalesced or dropped)
+        self.timer = None # StageTimer to profile draw() stages
+
         # Scene Objects
+        self.scene_file = scene_file
         self.objects = []
         self.init_scene()
+        for obj in self.objects:
+            obj.on_change = self.mark_dirty
+        self.canvas_batch = CanvasBatch(self.canvas)
+        self.pool = CanvasPool(self.canvas_batch) if RETAINED else None
+        self.picker = PickGrid()
+        self.animator = Animator() # Select animations in flight
+        self.zbuf = None
+        if RENDER_BACKEND == "zbuffer" and np is not None:
+            self.zbuf = ZBuffer(WIDTH, HEIGHT, BG_COLOR)
+            self.photo = tk.PhotoImage(width=WIDTH, height=HEIGHT)
+            self.canvas.create_image(0, 0, image=self.photo, anchor="nw")
+
+        # Static merge / BSP, octree and batch: everything draw() works from besides the camera
+        self.scene = SceneState(self.objects, use_bsp=USE_BSP and self.zbuf is None)
 
         # Input
         self.bind("<KeyPress>", self.on_key)
         self.bind("<KeyRelease>", self.on_key_release)
         self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Motion>", self.on_motion)
         self.bind("<MouseWheel>", self.on_zoom) # Windows
         self.bind("<Button-4>", self.on_zoom_up) # Linux
         self.bind("<Button-5>", self.on_zoom_down) # Linux
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
 
         # Loop
@@ -164,229 +1535,147 @@ class LivingRoomApp(tk.Tk):
         self.update_loop()
 
     def init_scene(self):
-        # Palette - Modern Scandi
-        C_WALL_BACK = "#B0BEC5"   # Cool Grey
-        C_WALL_SIDE = "#CFD8DC"   # Lighter Grey
-        C_FLOOR = "#D7CCC8"       # Light Wood
-        C_SOFA_MAIN = "#263238"   # Dark Blue/Grey
-        C_SOFA_ACCENT = "#546E7A" # Lighter Blue/Grey
-        C_TABLE_TOP = "#ECEFF1"   # White Marble
-        C_LEG = "#3E2723"         # Dark Wood
-        C_LAMP_SHADE = "#FFECB3"  # Warm Light
-        C_PLANT_POT = "#EFEBE9"   
-
-        # 1. Room Shell
-        # Floor (Large plate)
-        v, f = create_box(1200, 20, 1000, C_FLOOR)
-        self.objects.append(Object3D("Floor", v, f, Vector3(0, FLOOR_Y+10, 0)))
-        
-        # Walls
-        v, f = create_box(1200, 600, 20, C_WALL_BACK) 
-        self.objects.append(Object3D("Back Wall", v, f, Vector3(0, -150, -400))) # Back
-
-        v, f = create_box(20, 600, 1000, C_WALL_SIDE)
-        self.objects.append(Object3D("Left Wall", v, f, Vector3(-600, -150, 0))) # Left
-
-        # Baseboards (Skirtings)
-        v, f = create_box(1200, 15, 5, "#FFFFFF")
-        self.objects.append(Object3D("Baseboard Back", v, f, Vector3(0, FLOOR_Y-5, -390)))
-
-        # 2. Main Sofa (3-Seater) - Centered
-        # Seat Base
-        v, f = create_box(320, 45, 100, C_SOFA_MAIN)
-        self.objects.append(Object3D("Sofa Base", v, f, Vector3(0, FLOOR_Y-30, -100)))
-        # Backrest
-        v, f = create_box(320, 90, 30, C_SOFA_MAIN)
-        self.objects.append(Object3D("Sofa Back", v, f, Vector3(0, FLOOR_Y-70, -145)))
-        # Armrests
-        v, f = create_box(30, 70, 105, C_SOFA_ACCENT)
-        self.objects.append(Object3D("Arm Left", v, f, Vector3(-175, FLOOR_Y-50, -100)))
-        self.objects.append(Object3D("Arm Right", v, f, Vector3(175, FLOOR_Y-50, -100)))
-        # Cushions
-        v, f = create_box(280, 15, 80, C_SOFA_ACCENT)
-        self.objects.append(Object3D("Cushion", v, f, Vector3(0, FLOOR_Y-55, -100)))
-
-        # 3. Modern Coffee Table - In front of Sofa
-        # Top
-        v, f = create_box(160, 5, 90, C_TABLE_TOP)
-        self.objects.append(Object3D("Table Top", v, f, Vector3(0, FLOOR_Y-50, 50)))
-        # Legs
-        leg_geom = create_box(8, 45, 8, "#37474F") # Metal legs
-        for lx in [-70, 70]:
-            for lz in [20, 80]:
-                self.objects.append(Object3D("Table Leg", leg_geom[0], leg_geom[1], Vector3(lx, FLOOR_Y-25, lz)))
-
-        # 4. Standing Art/Decor (Right Side)
-        v, f = create_box(80, 120, 5, "#4E342E") # Frame
-        self.objects.append(Object3D("Art Frame", v, f, Vector3(300, FLOOR_Y-60, -380)))
-        v, f = create_box(70, 110, 2, "#FFCC80") # Canvas
-        self.objects.append(Object3D("Art Canvas", v, f, Vector3(300, FLOOR_Y-60, -376)))
-
-        # 5. Plant / Tall Vase (Left Corner)
-        # Pot
-        v, f = create_cylinder(25, 60, 12, C_PLANT_POT)
-        self.objects.append(Object3D("Vase", v, f, Vector3(-350, FLOOR_Y-30, -320)))
-        # Plant Stem
-        v, f = create_box(5, 120, 5, "#2E7D32")
-        self.objects.append(Object3D("Plant", v, f, Vector3(-350, FLOOR_Y-90, -320)))
-        # Leaves
-        v, f = create_box(60, 2, 40, "#4CAF50")
-        self.objects.append(Object3D("Leaf", v, f, Vector3(-330, FLOOR_Y-130, -320)))
-        self.objects.append(Object3D("Leaf", v, f, Vector3(-370, FLOOR_Y-110, -320)))
-
-        # 6. Floor Lamp (Right Front)
-        v, f = create_cylinder(5, 200, 6, "#BDBDBD") # Pole
-        self.objects.append(Object3D("Lamp Pole", v, f, Vector3(400, FLOOR_Y-100, 100)))
-        v, f = create_cylinder(30, 5, 10, "#424242") # Base
-        self.objects.append(Object3D("Lamp Base", v, f, Vector3(400, FLOOR_Y-2, 100)))
-        v, f = create_cylinder(40, 50, 12, C_LAMP_SHADE) # Shade
-        self.objects.append(Object3D("Lamp Shade", v, f, Vector3(400, FLOOR_Y-200, 100)))
-        
-        # 7. Rug
-        v, f = create_box(400, 2, 250, "#B0BEC5")
-        self.objects.append(Object3D("Rug", v, f, Vector3(0, FLOOR_Y+1, 0)))
-
+        self.objects.extend(load_scene(self.scene_file) if self.scene_file else build_scene())
 
     def on_key(self, event):
         self.keys_pressed[event.keysym] = True
+        if event.keysym in ROTATE_KEYS: self.wake()
+        if event.keysym == HUD_KEY: self.toggle_hud()
+
+    def on_close(self):
+        self.stats.close()
+        self.destroy()
+
+    def toggle_hud(self):
+        self.hud_shown = not self.hud_shown
+        if self.hud_shown:
+            self.hud.place(x=10, y=10)
+            self.mark_dirty() # Fills it with a fresh frame
+        else:
+            self.hud.place_forget()
     def on_key_release(self, event):
         self.keys_pressed[event.keysym] = False
 
     def on_zoom(self, event):
         if event.delta > 0: self.cam_zoom *= 1.1
         else: self.cam_zoom *= 0.9
+        self.mark_dirty()
         
-    def on_zoom_up(self, event): self.cam_zoom *= 1.1
-    def on_zoom_down(self, event): self.cam_zoom *= 0.9
+    def on_zoom_up(self, event): self.cam_zoom *= 1.1; self.mark_dirty()
+    def on_zoom_down(self, event): self.cam_zoom *= 0.9; self.mark_dirty()
+
+    def mark_dirty(self, obj=None):
+        """ Something visible changed (camera, zoom, object transform or selection) """
+        if obj is not None: self.scene.moved.add(obj)
+        self.dirty = True
+        self.wake()
+
+    def wake(self):
+        """ Schedule a tick if the loop is idle """
+        if self.loop_id is None:
+            self.loop_id = self.after_idle(self.update_loop)
+
+    def pick(self, x, y):
+        """ Index of the front-most object drawn at (x, y), -1 for empty space """
+        if self.zbuf is not None: return self.zbuf.pick(x, y)
+        return self.picker.pick(x, y)
 
     def on_click(self, event):
-        item = self.canvas.find_closest(event.x, event.y)
-        if not item: return
+        idx = self.pick(event.x, event.y)
+        if idx < 0:
+            self.info_text = "Empty Space"
+        else:
+            obj = self.objects[idx]
+            obj.toggle_select()
+            self.animator.animate(obj, "scale_val", obj.target_scale, SELECT_STEPS, SELECT_EASING)
+            self.info_text = f"Selected: {obj.name}"
+        self.label_info.config(text=self.info_text)
 
-        tags = self.canvas.gettags(item[0])
-        
-        name_found = None
-        for tag in tags:
-            if tag.startswith("obj:"):
-                idx = int(tag.split(":")[1])
-                obj = self.objects[idx]
-                is_sel = obj.toggle_select()
-                name_found = obj.name
-                
-                status = "Active" if is_sel else "Inactive"
-                self.label_info.config(text=f"Selected: {name_found}")
-                return 
-
-        if not name_found:
-            self.label_info.config(text="Empty Space")
+    def on_motion(self, event):
+        """ Hover feedback, Tk is only touched when the object under the cursor changes """
+        idx = self.pick(event.x, event.y)
+        if idx == self.hover: return
+        self.hover = idx
+        if idx < 0:
+            self.canvas.config(cursor="")
+            self.label_info.config(text=self.info_text)
+        else:
+            self.canvas.config(cursor="hand2")
+            self.label_info.config(text=f"{self.objects[idx].name} (click to select)")
 
     def update_loop(self):
-        # Scale/Rotate Controls
-        if self.keys_pressed.get("Left"): self.cam_angle_y -= 0.05
-        if self.keys_pressed.get("Right"): self.cam_angle_y += 0.05
-        if self.keys_pressed.get("Up"): self.cam_angle_x -= 0.05
-        if self.keys_pressed.get("Down"): self.cam_angle_x += 0.05
+        self.loop_id = "tick" # Changes made during this tick are drawn by it
+        now = time.perf_counter()
+        if self.last_tick is None:
+            self.lag = SIM_STEP # Waking up: one step right away, idle time isn't simulated
+        else:
+            self.lag += now - self.last_tick
+        self.last_tick = now
 
-        for obj in self.objects:
-            obj.update()
+        # Fixed timestep: as many steps as real time asks for, one render for all of them
+        due = int(self.lag / SIM_STEP)
+        for _ in range(min(due, MAX_STEPS)):
+            self.moving = self.step()
+        self.lag -= due * SIM_STEP
+        if due > 1: self.dropped_frames += due - 1
+
+        if self.dirty:
+            self.dirty = False
+            self.draw()
+
+        if self.moving:
+            # Next tick when the next step is due, minus the time this one took
+            delay = SIM_STEP - self.lag - (time.perf_counter() - now)
+            self.loop_id = self.after(max(1, int(delay * 1000)), self.update_loop)
+        else:
+            # Idle (no pending after) until the next input event
+            self.loop_id = self.last_tick = None
+
+    def step(self):
+        """ Advances camera rotation and animations by one SIM_STEP, returns True while anything moves """
+        # Scale/Rotate Controls
+        keys = self.keys_pressed
+        rotating = any(keys.get(k) for k in ROTATE_KEYS)
+        if rotating:
+            if keys.get("Left"): self.cam_angle_y -= 0.05
+            if keys.get("Right"): self.cam_angle_y += 0.05
+            if keys.get("Up"): self.cam_angle_x -= 0.05
+            if keys.get("Down"): self.cam_angle_x += 0.05
+            self.dirty = True
 
-        self.draw()
-        self.after(30, self.update_loop)
+        animating = self.animator.step()
+        return rotating or animating
 
     def draw(self):
-        self.canvas.delete("all")
-        cx, cy = WIDTH / 2, HEIGHT / 2
-        
-        cos_y, sin_y = math.cos(self.cam_angle_y), math.sin(self.cam_angle_y)
-        cos_x, sin_x = math.cos(self.cam_angle_x), math.sin(self.cam_angle_x)
+        t0 = time.perf_counter()
+        timer = self.timer
+        if timer: timer.start()
+        counting = self.hud_shown or self.stats.writer is not None
+        frame = render_frame(self.scene, self.cam_angle_x, self.cam_angle_y, self.cam_zoom, self.zbuf, timer, counting)
 
-        render_list = [] 
+        if self.zbuf is not None:
+            # One image upload per frame
+            self.photo.configure(data=self.zbuf.ppm(), format="PPM")
+            emitted = 1
+        else:
+            self.picker.reset(frame.render_list)
+            if self.pool is not None:
+                emitted = self.pool.sync(frame.render_list)
+            else:
+                self.canvas.delete("all")
+                self.canvas_batch.create([item[1:5] for item in frame.render_list])
+                emitted = len(frame.render_list) + 1
+        if timer: timer.lap("emit")
+        self.record_stats(t0, frame, emitted)
 
-        for i, obj in enumerate(self.objects):
-            # 1. World Transform
-            world_verts = obj.get_world_verts()
-            
-            # 2. Camera Transform
-            cam_verts = []
-            for v in world_verts:
-                # Rotate Y
-                x = v.x * cos_y - v.z * sin_y
-                z = v.x * sin_y + v.z * cos_y
-                # Rotate X
-                y = v.y * cos_x - z * sin_x
-                z = v.y * sin_x + z * cos_x
-                
-                # Zoom effect
-                x *= self.cam_zoom
-                y *= self.cam_zoom
-                z *= self.cam_zoom
-                
-                cam_verts.append(Vector3(x, y, z))
-
-            # 3. Faces Processing
-            for sub_indices, color_arg in obj.faces:
-                sub_verts = [cam_verts[idx] for idx in sub_indices]
-                
-                points_2d = []
-                depth_sum = 0
-                visible = True
-                
-                for v in sub_verts:
-                    dist = FOV + v.z # Moving camera back by FOV
-                    if dist < 10: 
-                        visible = False; break
-                    factor = FOV / dist
-                    px = cx + v.x * factor
-                    py = cy + v.y * factor
-                    points_2d.append((px, py))
-                    depth_sum += dist
-                
-                if visible and len(sub_verts) > 1:
-                    avg_depth = depth_sum / len(sub_verts)
-                    
-                    if obj.is_line:
-                         render_list.append((avg_depth, 2, points_2d, color_arg, f"obj:{i}"))
-                    else:
-                        # Lighting
-                        v0, v1, v2 = sub_verts[0], sub_verts[1], sub_verts[2]
-                        edge1, edge2 = v1.sub(v0), v2.sub(v0)
-                        normal = edge1.cross(edge2).normalize()
-                        
-                        # Backface Culling (Simple Check)
-                        # Eye vector is approx (0,0,-1) in camera space
-                        # If Normal.z < 0 it faces camera? Or > 0. 
-                        # Normals pointing towards camera have negative Z component in this system usually? 
-                        # Let's trust Z-sorting for now, but Culling helps perfs.
-                        # Cross product order matters.
-                        
-                        L_SOURCE = Vector3(0.4, -0.8, 0.4).normalize()
-                        intensity = normal.dot(L_SOURCE)
-                        val = 0.5 + (intensity * 0.5)
-                        val = max(0.3, min(1.0, val))
-
-                        # Color calc
-                        try:
-                            if color_arg.startswith("#"):
-                                r = int(int(color_arg[1:3], 16) * val)
-                                g = int(int(color_arg[3:5], 16) * val)
-                                b = int(int(color_arg[5:7], 16) * val)
-                                shade_col = f"#{r:02x}{g:02x}{b:02x}"
-                            else:
-                                shade_col = color_arg
-                        except ValueError:
-                            shade_col = color_arg
-
-                        render_list.append((avg_depth, 1, points_2d, shade_col, f"obj:{i}"))
-
-        # Sort by depth (Furthest first)
-        render_list.sort(key=lambda x: x[0], reverse=True)
-
-        for _, r_type, pts, col, tag in render_list:
-            if r_type == 1: # Poly
-                self.canvas.create_polygon(pts, fill=col, outline="", tags=tag)
-            elif r_type == 2: # Line
-                self.canvas.create_line(pts, fill=col, width=1, tags=tag)
+    def record_stats(self, t0, frame, emitted):
+        """ Frame counters for the HUD / CSV, skipped when neither is on """
+        if not self.hud_shown and self.stats.writer is None: return
+        self.stats.record(time.perf_counter() - t0, items_emitted=emitted, dropped_frames=self.dropped_frames,
+                          **frame_counters(self.scene, frame))
+        if self.hud_shown:
+            self.hud.config(text=self.stats.text())
 
 if __name__ == "__main__":
-    app = LivingRoomApp()
+    app = LivingRoomApp(sys.argv[1] if len(sys.argv) > 1 else SCENE_FILE)
     app.mainloop()
@@ -0,0 +1,71 @@
+import numpy as np
+
+class ZBuffer:
+    """ Software rasterizer: colour, depth and object-id buffers, shown as one tk.PhotoImage """
+    def __init__(self, width, height, background):
+        self.width, self.height = width, height
+        self.background = [int(background[k:k + 2], 16) for k in (1, 3, 5)] # "#rrggbb"
+        self.color = np.empty((height, width, 3), dtype=np.uint8)
+        self.inv_depth = np.empty((height, width), dtype=np.float32) # 1 / dist, 0 = empty
+        self.ids = np.empty((height, width), dtype=np.int32)         # Object index, -1 = empty
+        self.clear()
+
+    def clear(self):
+        self.color[:] = self.background
+        self.inv_depth.fill(0.0)
+        self.ids.fill(-1)
+
+    def draw_polygons(self, pts, dist, rgb, ids):
+        """ pts (F,k,2) screen points, dist (F,k) camera distance, rgb (F,3) uint8, ids (F,) """
+        k = pts.shape[1]
+        for i in range(1, k - 1): # Fan triangulation, polygons are convex
+            corners = [0, i, i + 1]
+            self.draw_triangles(pts[:, corners], dist[:, corners], rgb, ids)
+
+    def draw_triangles(self, tri, dist, rgb, ids):
+        w, h = self.width, self.height
+        x0, x1, x2 = tri[:, 0, 0], tri[:, 1, 0], tri[:, 2, 0]
+        y0, y1, y2 = tri[:, 0, 1], tri[:, 1, 1], tri[:, 2, 1]
+        area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+        inv = 1.0 / dist # 1/dist is affine in screen space, so it interpolates exactly
+
+        # Pixel-centre bounding boxes, clipped to the screen
+        bx0 = np.clip(np.ceil(tri[..., 0].min(axis=1) - 0.5), 0, w).astype(int)
+        bx1 = np.clip(np.floor(tri[..., 0].max(axis=1) - 0.5) + 1, 0, w).astype(int)
+        by0 = np.clip(np.ceil(tri[..., 1].min(axis=1) - 0.5), 0, h).astype(int)
+        by1 = np.clip(np.floor(tri[..., 1].max(axis=1) - 0.5) + 1, 0, h).astype(int)
+        todo = np.flatnonzero((np.abs(area) > 1e-9) & (bx1 > bx0) & (by1 > by0))
+
+        # Edge functions and 1/dist as affine planes a*x + b*y + c, edges scaled by 1/area so
+        # "inside" is all three >= 0 for either winding (they are then the barycentrics)
+        inv_area = 1.0 / np.where(area == 0, 1.0, area)
+        ea = np.stack((y1 - y2, y2 - y0, y0 - y1), axis=1) * inv_area[:, None]
+        eb = np.stack((x2 - x1, x0 - x2, x1 - x0), axis=1) * inv_area[:, None]
+        ec = np.stack((x1 * y2 - x2 * y1, x2 * y0 - x0 * y2, x0 * y1 - x1 * y0), axis=1) * inv_area[:, None]
+        za, zb, zc = (ea * inv).sum(axis=1), (eb * inv).sum(axis=1), (ec * inv).sum(axis=1)
+
+        for t in todo.tolist():
+            xs = np.arange(bx0[t], bx1[t], dtype=np.float32) + 0.5
+            ys = (np.arange(by0[t], by1[t], dtype=np.float32) + 0.5)[:, None]
+            inside = None
+            for e in range(3):
+                edge = xs * np.float32(ea[t, e]) + (ys * np.float32(eb[t, e]) + np.float32(ec[t, e])) >= 0
+                inside = edge if inside is None else inside & edge
+            iz = xs * np.float32(za[t]) + (ys * np.float32(zb[t]) + np.float32(zc[t]))
+
+            region = (slice(by0[t], by1[t]), slice(bx0[t], bx1[t]))
+            depth = self.inv_depth[region]
+            closer = inside & (iz > depth)
+            depth[closer] = iz[closer]
+            self.color[region][closer] = rgb[t]
+            self.ids[region][closer] = ids[t]
+
+    def pick(self, x, y):
+        """ Object index drawn at pixel (x, y), -1 for background """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.ids[int(y), int(x)])
+        return -1
+
+    def ppm(self):
+        """ Binary PPM of the colour buffer, for tk.PhotoImage(data=...) """
+        return b"P6\n%d %d\n255\n" % (self.width, self.height) + self.color.tobytes()